@@ -626,9 +626,9 @@ directory management, code analysis, data processing, and database management.
 
 from mcp.server.fastmcp import FastMCP
 import os
-import pdfplumber
-import json
+import sys
 import argparse
+from typing import Optional
 import requests
 import duckduckgo_search
 from bs4 import BeautifulSoup
@@ -638,37 +638,77 @@ from bs4 import BeautifulSoup
 mcp = FastMCP("PDFSummarizer")
 
 _base_dir = os.path.dirname(__file__)
+sys.path.insert(0, os.path.dirname(os.path.abspath(_base_dir)))
+import pdf_tools
+
 @mcp.tool()
-def read_pdf(file_path: str,extract_metadata: bool = False) -> dict:
+def read_pdf(file_path: str, extract_metadata: bool = False, page_start: int = 1,
+             page_end: Optional[int] = None, max_chars: Optional[int] = None,
+             cursor: Optional[str] = None, backend: str = "layout",
+             stream: bool = False, memory_budget_mb: Optional[int] = None) -> str:
     """
     Read and return text from PDF file with optional metadata.
+    Page text is served from the shared on-disk cache when the file is unchanged.
+    Large documents can be paged through with page_start/page_end and max_chars;
+    a truncated response ends with a cursor to pass back for the next window.
     
     Args:
+        file_path: Path to the PDF file, relative to this server
         extract_metadata: Whether to include PDF metadata (default: False)
+        page_start: First page to return, 1-based (default: 1)
+        page_end: Last page to return (default: last page)
+        max_chars: Stop after this many characters of page text (default: no limit)
+        cursor: Continuation cursor from a previous truncated response
+        backend: "layout" (pdfplumber, default), "fast" (PyPDF2) or "auto" (fast, falling
+            back to layout for pages with empty or garbled output)
+        stream: Extract page by page with bounded memory and report peak memory use
+        memory_budget_mb: RSS limit for stream mode; extraction stops with a cursor when exceeded
     """
-   
-        
-    result = []
-    abs_path = os.path.join(_base_dir, file_path)    
-    with pdfplumber.open(abs_path) as pdf:
-        if extract_metadata and pdf.metadata:
-                result.append(f"PDF Metadata: {json.dumps(pdf.metadata, indent=2, default=str)}\n")
-            
-        result.append(f"Total pages: {len(pdf.pages)}\n")
-            
-        text_content = ""
-        for i, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text() or ""
-                if page_text.strip():
-                    text_content += f"\n--- Page {i} ---\n{page_text}\n"        
-        if text_content.strip():
-                result.append(text_content)
-        else:
-                result.append("No readable text found in PDF")
-        return "".join(result)
-    return f"Error reading PDF: {str(e)}"
+    abs_path = os.path.join(_base_dir, file_path)
+    try:
+        return pdf_tools.read_pdf_text(
+            abs_path, extract_metadata, page_start=page_start, page_end=page_end, max_chars=max_chars,
+            cursor=cursor, backend=backend, stream=stream, memory_budget_mb=memory_budget_mb,
+        )
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
 
 
+@mcp.tool()
+def pdf_info(file_path: str) -> dict:
+    """
+    Get page count and metadata of a PDF (or of every PDF in a directory)
+    without extracting any text.
+    
+    Args:
+        file_path: Path to a PDF file or directory, relative to this server
+    """
+    abs_path = os.path.join(_base_dir, file_path)
+    try:
+        if os.path.isdir(abs_path):
+            return {"directory": abs_path, "files": pdf_tools.pdf_inventory(abs_path)}
+        return pdf_tools.pdf_info(abs_path)
+    except Exception as e:
+        return {"error": f"Error reading PDF info: {str(e)}"}
+
+
+@mcp.tool()
+def search_pdfs(query: str, directory: str = ".", limit: int = 20) -> dict:
+    """
+    Full-text search across every PDF under a directory.
+    
+    Args:
+        query: Words to look for (all must appear on the page)
+        directory: Directory to search, relative to this server (default: this folder)
+        limit: Maximum number of page hits to return (default: 20)
+    """
+    abs_path = os.path.join(_base_dir, directory)
+    try:
+        return pdf_tools.search_pdfs(query, abs_path, limit)
+    except Exception as e:
+        return {"error": f"Error searching PDFs: {str(e)}"}
+
 
 @mcp.tool()
 def scrape_url(url: str) -> str:
@@ -729,15 +769,36 @@ def scrape_url(url: str) -> str:
 
 
 from urllib.parse import urljoin, urlparse
-import chromadb
-from sentence_transformers import SentenceTransformer
+import hashlib
+import threading
+
 
 
+# Vector DB + embeddings, created on first use: pdf_tools' worker processes
+# re-import this script, and must not each load the model and open the DB.
+_vector_lock = threading.Lock()
+_chroma_client = None
+_embedder = None
 
-# Vector DB + embeddings
-chroma_client = chromadb.PersistentClient(path="web_cache")
-collection = chroma_client.get_or_create_collection("website_pages")
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+
+def get_collection(name: str):
+    """Return a ChromaDB collection from the shared web_cache client."""
+    global _chroma_client
+    with _vector_lock:
+        if _chroma_client is None:
+            import chromadb
+            _chroma_client = chromadb.PersistentClient(path="web_cache")
+        return _chroma_client.get_or_create_collection(name)
+
+
+def get_embedder():
+    """Return the shared sentence embedding model."""
+    global _embedder
+    with _vector_lock:
+        if _embedder is None:
+            from sentence_transformers import SentenceTransformer
+            _embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        return _embedder
 
 
 @mcp.tool()
@@ -782,8 +843,8 @@ def crawl_site(base_url: str, max_pages: int = 20, exclude_urls: list[str] = Non
             content = "\n".join(lines)
 
             # Save into Chroma
-            embedding = embedder.encode([content])[0]
-            collection.add(
+            embedding = get_embedder().encode([content])[0]
+            get_collection("website_pages").add(
                 documents=[content],
                 embeddings=[embedding],
                 ids=[url]
@@ -817,8 +878,8 @@ def ask_site(question: str, top_k: int = 3) -> str:
         str: Relevant content snippets from the website.
     """
     try:
-        embedding = embedder.encode([question])[0]
-        results = collection.query(
+        embedding = get_embedder().encode([question])[0]
+        results = get_collection("website_pages").query(
             query_embeddings=[embedding],
             n_results=top_k
         )
@@ -836,6 +897,125 @@ def ask_site(question: str, top_k: int = 3) -> str:
         return f"Error querying site: {str(e)}"
 
 
+# PDF passages live next to the crawled pages, in their own collection
+PDF_COLLECTION = "pdf_passages"
+
+
+def _split_passages(text: str, size: int, overlap: int) -> list[str]:
+    """
+    Split page text into ~size-character passages, breaking on whitespace.
+    Requires size > 0 and 0 <= overlap < size; consecutive passages start at
+    least (size - overlap) / 2 characters apart.
+    """
+    if size <= 0 or not 0 <= overlap < size:
+        raise ValueError(f"need passage_chars > 0 and 0 <= overlap < passage_chars (got {size}, {overlap})")
+    passages, start = [], 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            # Don't break so early that the overlap would swallow most of the passage
+            space = text.rfind(" ", start + (size + overlap) // 2, end)
+            end = space if space != -1 else end
+        passage = text[start:end].strip()
+        if passage:
+            passages.append(passage)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return passages
+
+
+@mcp.tool()
+def index_pdf(file_path: str, passage_chars: int = 1000, overlap: int = 200, batch_size: int = 64) -> str:
+    """
+    Split a PDF into page-anchored passages, embed them and store them in ChromaDB.
+    Re-indexing an unchanged file with the same passage settings is a no-op; a changed
+    file or new settings replace that file's old passages.
+    
+    Args:
+        file_path (str): Path to the PDF file, relative to this server.
+        passage_chars (int): Target passage length in characters (default: 1000).
+        overlap (int): Characters shared between consecutive passages, less than
+            passage_chars (default: 200).
+        batch_size (int): Passages embedded per encoder call (default: 64).
+    
+    Returns:
+        str: Number of passages indexed.
+    """
+    if passage_chars <= 0 or not 0 <= overlap < passage_chars:
+        return "Error: passage_chars must be positive and overlap must be at least 0 and less than passage_chars"
+    if batch_size <= 0:
+        return "Error: batch_size must be positive"
+    abs_path = os.path.abspath(os.path.join(_base_dir, file_path))
+    try:
+        digest = pdf_tools.get_cache().content_hash(abs_path)
+        pdf_collection = get_collection(PDF_COLLECTION)
+        indexed = {"$and": [{"source": abs_path}, {"hash": digest},
+                            {"passage_chars": passage_chars}, {"overlap": overlap}]}
+        if pdf_collection.get(where=indexed, limit=1)["ids"]:
+            return f"{file_path} is already indexed"
+
+        pdf_collection.delete(where={"source": abs_path})
+        _metadata, _page_count, texts = pdf_tools.load_pages(abs_path)
+
+        # The same PDF may be indexed under several paths; ids must not collide
+        source_id = hashlib.sha1(abs_path.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+        ids, documents, metadatas = [], [], []
+        for page_no, text in enumerate(texts, 1):
+            for i, passage in enumerate(_split_passages(text, passage_chars, overlap)):
+                ids.append(f"{source_id}:{digest[:16]}:p{page_no}:{i}")
+                documents.append(passage)
+                metadatas.append({"source": abs_path, "page": page_no, "hash": digest,
+                                  "passage_chars": passage_chars, "overlap": overlap})
+
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            embeddings = get_embedder().encode(documents[start:end], batch_size=batch_size)
+            pdf_collection.add(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                embeddings=[embedding.tolist() for embedding in embeddings],
+                metadatas=metadatas[start:end]
+            )
+
+        return f"Indexed {len(documents)} passages from {len(texts)} pages of {file_path}"
+    except Exception as e:
+        return f"Error indexing PDF: {str(e)}"
+
+
+@mcp.tool()
+def ask_pdf(question: str, file_path: str = "", top_k: int = 3) -> str:
+    """
+    Answer-retrieval over indexed PDFs: returns the passages most relevant to a question,
+    each with its file and page citation.
+    
+    Args:
+        question (str): The natural language question to ask.
+        file_path (str): Restrict the search to one indexed PDF (default: all PDFs).
+        top_k (int): Number of passages to return (default: 3).
+    
+    Returns:
+        str: Relevant passages with page citations.
+    """
+    try:
+        where = {"source": os.path.abspath(os.path.join(_base_dir, file_path))} if file_path else None
+        embedding = get_embedder().encode([question])[0]
+        results = get_collection(PDF_COLLECTION).query(
+            query_embeddings=[embedding.tolist()],
+            n_results=top_k,
+            where=where
+        )
+
+        output = []
+        for i, (doc, meta) in enumerate(zip(results["documents"][0], results["metadatas"][0])):
+            source = os.path.relpath(meta["source"], _base_dir)
+            output.append(f"[Result {i+1}] {source}, page {meta['page']}\n{doc}\n")
+
+        return "\n".join(output) if output else "No relevant passages found. Index the PDF with index_pdf first."
+    except Exception as e:
+        return f"Error querying PDFs: {str(e)}"
+
+
 
 
 
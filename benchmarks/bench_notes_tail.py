@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-file read vs. reverse block reader for the latest notes.
+Run with:
+    python benchmarks/bench_notes_tail.py [--size-mb 300] [--limit 10 1000]
+
+Generates a timestamped notes file of the requested size in a temp directory,
+then times the old read_notes approach (read and strip every line, slice the
+end) against notes_store.tail_lines.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import notes_store
+
+
+def _write_notes(path: str, size_mb: int):
+    line = "[2025-08-29 17:03:52] Reviewed tender notice section {0}: follow up with procurement team\n"
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        written, i = 0, 0
+        while written < target:
+            chunk = "".join(line.format(n) for n in range(i, i + 10000))
+            f.write(chunk)
+            written += len(chunk)
+            i += 10000
+
+
+def _full_read(path: str, limit: int):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return lines[-limit:]
+
+
+def _best(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--limit", type=int, nargs="+", default=[1, 10, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Notes.txt")
+        _write_notes(path, args.size_mb)
+        print(f"Notes file: {os.path.getsize(path) / 1024 / 1024:.0f} MB, best of {args.repeat}")
+        print(f"{'limit':>6} {'full read (s)':>14} {'tail (ms)':>10} {'speedup':>9}")
+        for limit in args.limit:
+            assert notes_store.tail_lines(path, limit) == _full_read(path, limit)
+            full = _best(lambda: _full_read(path, limit), args.repeat)
+            tail = _best(lambda: notes_store.tail_lines(path, limit), args.repeat)
+            print(f"{limit:>6} {full:>14.3f} {tail * 1000:>10.3f} {full / tail:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one global lock vs. per-path reader/writer locks.
+Run with:
+    python benchmarks/bench_path_locks.py [--clients 1 8 32] [--ops 200] [--io-ms 1.0]
+
+Each client thread reads and writes its own file (disjoint paths), with an
+extra --io-ms of blocking I/O per operation standing in for a large file.
+A second scenario has every client reading one shared file. Reports
+operations per second for each locking scheme.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import path_locks
+
+
+class GlobalLock:
+    """The old scheme: every read and write goes through one threading.Lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def read(self, path):
+        with self._lock:
+            yield
+
+    write = read
+
+
+def _client(locks, path: str, ops: int, io_delay: float, write_every: int):
+    for i in range(ops):
+        if write_every and i % write_every == 0:
+            with locks.write(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(f"value {i}\n")
+                time.sleep(io_delay)
+        else:
+            with locks.read(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    f.read()
+                time.sleep(io_delay)
+
+
+def _run(locks, paths, ops: int, io_delay: float, write_every: int) -> float:
+    threads = [threading.Thread(target=_client, args=(locks, path, ops, io_delay, write_every))
+               for path in paths]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(paths) * ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--io-ms", type=float, default=1.0)
+    parser.add_argument("--write-every", type=int, default=4, help="every Nth op is a write (0 = reads only)")
+    args = parser.parse_args()
+    io_delay = args.io_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(max(args.clients)):
+            files.append(os.path.join(tmp, f"file_{i}.txt"))
+            with open(files[-1], "w", encoding="utf-8") as f:
+                f.write("initial\n")
+
+        print(f"{args.ops} ops per client, {args.io_ms} ms I/O per op, 1 write in {args.write_every}")
+        print(f"{'scenario':<16} {'clients':>7} {'global (ops/s)':>15} {'per-path (ops/s)':>17} {'speedup':>8}")
+        for clients in args.clients:
+            scenarios = [("disjoint files", files[:clients], args.write_every),
+                         ("one file, reads", [files[0]] * clients, 0)]
+            for name, paths, write_every in scenarios:
+                old = _run(GlobalLock(), paths, args.ops, io_delay, write_every)
+                new = _run(path_locks.PathLocks(), paths, args.ops, io_delay, write_every)
+                print(f"{name:<16} {clients:>7} {old:>15.0f} {new:>17.0f} {new / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PyPDF2 ("fast") vs. pdfplumber ("layout") vs. "auto" extraction.
+Run with:
+    python benchmarks/bench_pdf_backends.py [PDF_FILE ...] [--repeat N]
+
+Defaults to every PDF in 29-08/. Extraction bypasses the page cache and runs
+serially so only the backends are compared. Fidelity is the word-sequence
+similarity of each backend's output to the layout output (1.00 = identical).
+"""
+
+import argparse
+import difflib
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pdf_tools
+
+
+def _similarity(text: str, reference: str) -> float:
+    return difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*", default=sorted(str(p) for p in (ROOT / "29-08").glob("*.pdf")))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'file':<24} {'backend':<7} {'pages':>5} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'fidelity':>8}")
+    for pdf in args.pdfs:
+        page_count = pdf_tools.pdf_info(pdf)["pages"]
+        pages = list(range(1, page_count + 1))
+
+        timings, outputs = {}, {}
+        for backend in ("layout", "fast", "auto"):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                texts = pdf_tools.extract_pages(pdf, pages, workers=1, backend=backend)
+                best = min(best, time.perf_counter() - start)
+            timings[backend] = best
+            outputs[backend] = "\n".join(texts[i] for i in pages)
+
+        for backend in ("layout", "fast", "auto"):
+            seconds = timings[backend]
+            print(f"{Path(pdf).name[:24]:<24} {backend:<7} {page_count:>5} {seconds:>8.3f} "
+                  f"{page_count / seconds:>8.1f} {timings['layout'] / seconds:>7.2f}x "
+                  f"{_similarity(outputs[backend], outputs['layout']):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
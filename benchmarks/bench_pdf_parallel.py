@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs. process-pool PDF page extraction.
+Run with:
+    python benchmarks/bench_pdf_parallel.py [PDF_FILE] [--repeat N]
+
+Extraction bypasses the page cache, so every run parses the document.
+Prints wall time and speedup over serial for 1..cpu_count workers; each
+worker count runs on its own pool of that many processes.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pdfplumber
+import pdf_tools
+
+
+def _worker_counts(max_workers: int):
+    counts, n = [1], 2
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf", nargs="?", default=str(ROOT / "29-08" / "pdf2.pdf"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with pdfplumber.open(args.pdf) as pdf:
+        page_count = len(pdf.pages)
+    pages = list(range(1, page_count + 1))
+
+    # Force the pool path even for short sample documents.
+    pdf_tools.PDF_PARALLEL_MIN_PAGES = 2
+
+    print(f"{args.pdf}: {page_count} pages, best of {args.repeat}")
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    baseline = None
+    for workers in _worker_counts(args.max_workers):
+        if workers > 1:
+            pdf_tools.extract_pages(args.pdf, pages[:2], workers)  # warm up the pool
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pdf_tools.extract_pages(args.pdf, pages, workers)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>9.3f} {page_count / best:>9.1f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
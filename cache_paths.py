@@ -0,0 +1,11 @@
+"""
+On-disk cache location for the MCP servers.
+Description: Every persistent cache (PDF pages, search indexes, line indexes,
+previews) lives under CACHE_DIR, next to the servers unless MCP_CACHE_DIR
+points elsewhere.
+"""
+
+import os
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("MCP_CACHE_DIR", Path(__file__).parent / ".mcp_cache"))
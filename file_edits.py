@@ -0,0 +1,347 @@
+"""
+File editing helpers for the MCP servers.
+Description: Content hashing (with a stat-keyed hash cache for ETags), atomic
+temp-file + os.replace writes, and applying small edits (unified diffs or
+line-range replacements) so clients can change a few lines of a large file
+without sending the whole file.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_LINE = re.compile(r"[^\n]*\n|[^\n]+$")
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest used as the base hash for edits."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class HashCache:
+    """
+    In-memory (path, mtime, size) -> content hash cache, so a file's ETag can
+    be checked with a stat() instead of re-reading the file.
+
+    A file modified within RACY_WINDOW seconds of being hashed could change
+    again without its mtime moving, so such entries are not trusted.
+    """
+
+    RACY_WINDOW = 2.0
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, int, float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[str]:
+        """Return the cached hash if the file is unchanged since it was hashed."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            mtime_ns, size, hashed_at, digest = entry
+            if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+                del self._entries[path]
+                return None
+            if hashed_at - stat.st_mtime_ns / 1e9 < self.RACY_WINDOW:
+                return None
+            self._entries.move_to_end(path)
+            return digest
+
+    def put(self, path: str, stat: os.stat_result, digest: str):
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, time.time(), digest)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# =============================================
+# ATOMIC WRITES
+# =============================================
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _umask()  # read once: os.umask can only be read by setting it
+
+
+def _copy_mode(target: str, tmp_path: str):
+    """
+    Give a staged temp file (created 0600 by mkstemp) the target's mode, or
+    for a new file the mode open() would have given it.
+    """
+    try:
+        shutil.copymode(target, tmp_path)
+    except FileNotFoundError:
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+
+
+def atomic_write(path: str, content: str, newline: Optional[str] = None):
+    """
+    Write content to path through a temp file in the same directory and
+    os.replace, so readers see either the old or the new file, never a mix.
+    The file keeps its mode; a new file gets the usual umask-based mode.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", text=True)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline=newline) as tmpf:
+            tmpf.write(content)
+        _copy_mode(path, tmp_path)
+        os.replace(tmp_path, path)  # atomic replace
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+
+def _fsync_directory(directory: str):
+    """Make renames in directory durable (a no-op where directories can't be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_many(files: Dict[str, str], fsync: bool = True):
+    """
+    Write several files as one transaction: stage every file in a temp file,
+    fsync them as one batch, then rename them all into place. If staging fails
+    nothing changes; if a rename fails, files already replaced are restored
+    from backups (hard links of the originals) and new files are removed.
+
+    Files keep their modes, as with atomic_write.
+    Paths must be absolute. Raises OSError after rolling back.
+    """
+    staged: List[Tuple[str, str]] = []  # (temp path, target)
+    backups: Dict[str, Optional[str]] = {}  # target -> backup path, None if it did not exist
+    replaced: List[str] = []
+    try:
+        for target, content in files.items():
+            directory = os.path.dirname(target)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+            staged.append((tmp_path, target))
+            with os.fdopen(fd, "w", encoding="utf-8") as tmpf:
+                tmpf.write(content)
+                if fsync:
+                    tmpf.flush()
+                    os.fsync(tmpf.fileno())
+
+        for tmp_path, target in staged:
+            _copy_mode(target, tmp_path)
+            backups[target] = None
+            if os.path.exists(target):
+                backup = os.path.join(os.path.dirname(target), f".bak_{uuid.uuid4().hex}")
+                try:
+                    os.link(target, backup)
+                except OSError:
+                    shutil.copy2(target, backup)
+                backups[target] = backup
+
+        try:
+            for tmp_path, target in staged:
+                os.replace(tmp_path, target)
+                replaced.append(target)
+        except OSError:
+            for target in reversed(replaced):
+                try:
+                    if backups[target] is None:
+                        os.remove(target)
+                    else:
+                        os.replace(backups[target], target)
+                except OSError:
+                    pass
+            raise
+
+        if fsync:
+            for directory in {os.path.dirname(target) for _tmp, target in staged}:
+                _fsync_directory(directory)
+    finally:
+        for tmp_path, _target in staged:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        for backup in backups.values():
+            if backup and os.path.exists(backup):
+                try:
+                    os.remove(backup)
+                except OSError:
+                    pass
+
+
+# =============================================
+# EDITS
+# =============================================
+
+def split_lines(text: str) -> List[str]:
+    """Split text into lines, keeping each line's own newline."""
+    return _LINE.findall(text)
+
+
+def _newline_for(lines: List[str]) -> str:
+    return "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+
+
+def _same_line(a: str, b: str) -> bool:
+    return a.rstrip("\r\n") == b.rstrip("\r\n")
+
+
+def apply_unified_diff(text: str, diff: str) -> Tuple[str, int, int, int]:
+    """
+    Apply a unified diff to text. Context and removed lines must match exactly
+    (line endings aside); there is no fuzzy matching, since edits are made
+    against a known base hash.
+
+    Returns (new text, hunks applied, lines added, lines removed).
+    Raises ValueError when the diff is malformed or does not match.
+    """
+    lines = split_lines(text)
+    newline = _newline_for(lines)
+    # Split on "\n" only: str.splitlines() would also break lines at \x0c, \x1c
+    # or \u2028 inside a line. A CRLF diff loses its "\r"s like the file lines do.
+    diff_lines = [line[:-1] if line.endswith("\r") else line for line in diff.split("\n")]
+    if diff_lines[-1] == "":
+        diff_lines.pop()  # after the final newline
+    result: List[str] = []
+    position = 0  # index into lines of the next unconsumed line
+    hunks = added = removed = 0
+
+    i = 0
+    while i < len(diff_lines):
+        header = _HUNK_HEADER.match(diff_lines[i])
+        if not header:
+            if hunks and diff_lines[i].strip():
+                raise ValueError(f"Unexpected diff line {i + 1}: {diff_lines[i]!r}")
+            i += 1  # ---/+++ file headers, blank lines
+            continue
+
+        old_start, old_count = int(header.group(1)), int(header.group(2) or 1)
+        new_count = int(header.group(4) or 1)
+        # A hunk that removes nothing and starts at line N inserts after line N
+        start = old_start if old_count == 0 else old_start - 1
+        if start < position or start > len(lines):
+            raise ValueError(f"Hunk {hunks + 1} (@@ -{old_start}) is out of order or past the end of the file")
+        result.extend(lines[position:start])
+        position = start
+
+        i += 1
+        seen_old = seen_new = 0
+        while i < len(diff_lines) and (seen_old < old_count or seen_new < new_count):
+            line = diff_lines[i]
+            tag, body = (line[:1], line[1:]) if line else (" ", "")
+            no_newline = i + 1 < len(diff_lines) and diff_lines[i + 1].startswith("\\")
+            if tag in (" ", "-"):
+                if position >= len(lines) or not _same_line(lines[position], body):
+                    raise ValueError(f"Hunk {hunks + 1} does not match the file at line {position + 1}")
+                if tag == " ":
+                    result.append(lines[position])
+                else:
+                    removed += 1
+                position += 1
+                seen_old += 1
+            elif tag == "+":
+                result.append(body if no_newline else body + newline)
+                added += 1
+                seen_new += 1
+            else:
+                raise ValueError(f"Unexpected diff line {i + 1}: {line!r}")
+            if tag == " ":
+                seen_new += 1
+            i += 2 if no_newline else 1
+
+        if seen_old != old_count or seen_new != new_count:
+            raise ValueError(f"Hunk {hunks + 1} is shorter than its header says")
+        hunks += 1
+
+    if not hunks:
+        raise ValueError("No hunks found in diff")
+    result.extend(lines[position:])
+    return "".join(result), hunks, added, removed
+
+
+def replace_lines(text: str, start_line: int, end_line: int, replacement: str) -> Tuple[str, int, int]:
+    """
+    Replace lines start_line..end_line (1-based, inclusive) with replacement.
+    end_line = start_line - 1 inserts before start_line without removing anything.
+
+    Returns (new text, lines added, lines removed).
+    Raises ValueError for a range outside the file.
+    """
+    lines = split_lines(text)
+    if start_line < 1 or start_line > len(lines) + 1:
+        raise ValueError(f"start_line {start_line} is outside the file (1-{len(lines) + 1})")
+    if end_line < start_line - 1 or end_line > len(lines):
+        raise ValueError(f"end_line {end_line} is outside the file ({start_line - 1}-{len(lines)})")
+
+    new_lines = split_lines(replacement)
+    if new_lines and not new_lines[-1].endswith("\n"):
+        # Keep the following line on its own line; at the end, follow the original file
+        at_end = end_line == len(lines)
+        if not at_end or (lines and lines[-1].endswith("\n")):
+            new_lines[-1] += _newline_for(lines)
+    removed = end_line - start_line + 1
+    result = lines[:start_line - 1] + new_lines + lines[end_line:]
+    return "".join(result), len(new_lines), removed
+
+
+class StaleBaseHash(ValueError):
+    """The file no longer matches the base hash an edit was made against."""
+
+    def __init__(self, current: str):
+        super().__init__(f"base_hash does not match the current content (current hash: {current})")
+        self.current = current
+
+
+def edit_file(path: str, base_hash: str, diff: Optional[str] = None, start_line: Optional[int] = None,
+              end_line: Optional[int] = None, replacement: str = "") -> Tuple[int, int, int, str]:
+    """
+    Apply a unified diff, or replace lines start_line..end_line (default:
+    start_line) with replacement, to the UTF-8 file at path, provided its
+    bytes still hash to base_hash. The result is written atomically with its
+    line endings untouched. Callers hold whatever lock guards path.
+
+    Returns (hunks applied, lines added, lines removed, new hash).
+    Raises StaleBaseHash if the file changed, ValueError if the edit does not
+    apply (or the file is not UTF-8), OSError if it can't be read or written.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    current = content_hash(data)
+    if base_hash.lower() != current:
+        raise StaleBaseHash(current)
+
+    text = data.decode("utf-8")
+    if diff is not None:
+        text, hunks, added, removed = apply_unified_diff(text, diff)
+    else:
+        text, added, removed = replace_lines(text, start_line, start_line if end_line is None else end_line,
+                                             replacement)
+        hunks = 1
+
+    atomic_write(path, text, newline="")
+    return hunks, added, removed, content_hash(text.encode("utf-8"))
@@ -0,0 +1,206 @@
+"""
+Text search engine for find_in_files.
+Description: Scans files for a literal or regular-expression match over
+memory-mapped bytes, skips binary files by sniffing their first block, and
+spreads files across the shared worker pool in batches. Results are yielded
+per file, in path order, as batches finish, and the scan stops early once
+max_results matching lines have been found.
+"""
+
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+import worker_pool
+
+# Batches in flight are 2 * SEARCH_WORKERS; they always run on the shared default pool
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", min(8, worker_pool.POOL_WORKERS)))
+SEARCH_PARALLEL_MIN_FILES = int(os.environ.get("SEARCH_PARALLEL_MIN_FILES", 64))
+SEARCH_BATCH = 32  # files per worker task
+_SNIFF_BYTES = 8192
+
+
+def compile_pattern(pattern: str, regex: bool = False, case_sensitive: bool = False) -> "re.Pattern":
+    """
+    Compile a search pattern. Matching runs on raw bytes when it can; a
+    case-insensitive pattern with non-ASCII characters (whose case folding
+    bytes regexes can't do) is compiled as a str pattern instead.
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    source = pattern if regex else re.escape(pattern)
+    if case_sensitive or pattern.isascii():
+        return re.compile(source.encode("utf-8"), flags | re.MULTILINE)
+    return re.compile(source, flags | re.MULTILINE)
+
+
+def _line_match(line_number: int, line: bytes, column: int) -> Dict[str, Any]:
+    return {
+        "line_number": line_number,
+        "line_content": line.decode("utf-8", errors="ignore").strip(),
+        # Position in characters, like str.find on the decoded line
+        "match_position": len(line[:column].decode("utf-8", errors="ignore")),
+    }
+
+
+def scan_file(path: str, matcher: "re.Pattern", max_per_file: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    First match on each matching line of one file, or None if nothing matched
+    or the file looks binary. Stops after max_per_file matching lines.
+    """
+    try:
+        with open(path, "rb") as f:
+            if b"\0" in f.read(_SNIFF_BYTES):
+                return None
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if isinstance(matcher.pattern, bytes):
+                    matches = _scan_bytes(mm, matcher, max_per_file)
+                else:
+                    matches = _scan_text(mm[:].decode("utf-8", errors="ignore"), matcher, max_per_file)
+    except (OSError, ValueError):
+        return None  # Skip files that can't be read or mapped
+
+    if not matches:
+        return None
+    return {"file_path": path, "matches_count": len(matches), "matches": matches}
+
+
+def _scan_bytes(mm: mmap.mmap, matcher: "re.Pattern", max_per_file: Optional[int]) -> List[Dict[str, Any]]:
+    matches = []
+    position = 0
+    line_number, counted_to = 1, 0
+    while max_per_file is None or len(matches) < max_per_file:
+        found = matcher.search(mm, position)
+        if found is None:
+            break
+        start = found.start()
+        line_start = mm.rfind(b"\n", 0, start) + 1
+        line_end = mm.find(b"\n", start)
+        if line_end < 0:
+            line_end = len(mm)
+        line_number += mm[counted_to:line_start].count(b"\n")
+        counted_to = line_start
+        matches.append(_line_match(line_number, mm[line_start:line_end], start - line_start))
+        # One entry per line: continue after this line
+        position = line_end + 1
+        if position > len(mm):
+            break
+    return matches
+
+
+def _scan_text(text: str, matcher: "re.Pattern", max_per_file: Optional[int]) -> List[Dict[str, Any]]:
+    matches = []
+    for line_number, line in enumerate(text.split("\n"), 1):
+        found = matcher.search(line)
+        if found:
+            matches.append({
+                "line_number": line_number,
+                "line_content": line.strip(),
+                "match_position": found.start(),
+            })
+            if max_per_file is not None and len(matches) >= max_per_file:
+                break
+    return matches
+
+
+def _scan_batch(paths: List[str], pattern: str, regex: bool, case_sensitive: bool,
+                max_per_file: Optional[int], max_results: Optional[int]) -> List[Dict[str, Any]]:
+    """Worker task: scan a batch of files, stopping once more than max_results lines matched."""
+    matcher = compile_pattern(pattern, regex, case_sensitive)
+    results, found = [], 0
+    for path in paths:
+        result = scan_file(path, matcher, max_per_file)
+        if result:
+            results.append(result)
+            found += result["matches_count"]
+            if max_results is not None and found > max_results:
+                break
+    return results
+
+
+class SearchScan:
+    """
+    One search over a list of files. Iterating yields one result per matching
+    file (file_path, matches_count, matches), in the order of the paths given,
+    as soon as it is known; iteration stops once max_results matching lines
+    have been yielded (the last file's matches are cut to fit).
+
+    Afterwards `truncated` tells whether matching lines were left unreported.
+    The scan reads on until it finds one line past max_results, so a search
+    with exactly max_results matches is not reported as truncated.
+
+    Small file lists are scanned in this process; larger ones are split into
+    batches across the worker pool with a bounded number of batches in flight,
+    so stopping early leaves little work to cancel.
+    Raises re.error for an invalid regular expression.
+    """
+
+    def __init__(self, paths: Iterable[str], pattern: str, regex: bool = False,
+                 case_sensitive: bool = False, max_results: Optional[int] = None,
+                 max_per_file: Optional[int] = None, workers: Optional[int] = None):
+        self.matcher = compile_pattern(pattern, regex, case_sensitive)  # validate before starting
+        self.paths = list(paths)
+        self.pattern = pattern
+        self.regex = regex
+        self.case_sensitive = case_sensitive
+        self.max_results = max_results
+        self.max_per_file = max_per_file
+        self.workers = SEARCH_WORKERS if workers is None else workers
+        self.truncated = False
+        self._found = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self.workers <= 1 or len(self.paths) < SEARCH_PARALLEL_MIN_FILES:
+            results = (scan_file(path, self.matcher, self.max_per_file) for path in self.paths)
+        else:
+            results = self._scan_parallel()
+        try:
+            for result in results:
+                if not result:
+                    continue
+                if self.max_results is not None and self._found + result["matches_count"] > self.max_results:
+                    self.truncated = True
+                    result = _trim(result, self.max_results - self._found)
+                    if result["matches_count"]:
+                        self._found += result["matches_count"]
+                        yield result
+                    return
+                self._found += result["matches_count"]
+                yield result
+        finally:
+            results.close()
+
+    def _scan_parallel(self) -> Iterator[Dict[str, Any]]:
+        """Results of every batch, taken in submission order so the cut-off is stable."""
+        pool = worker_pool.get_pool()
+        batches = iter([self.paths[i:i + SEARCH_BATCH] for i in range(0, len(self.paths), SEARCH_BATCH)])
+        pending: Deque[Future] = deque()
+
+        def _submit():
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append(pool.submit(_scan_batch, batch, self.pattern, self.regex, self.case_sensitive,
+                                           self.max_per_file, self.max_results))
+
+        try:
+            for _ in range(self.workers * 2):
+                _submit()
+            while pending:
+                future = pending.popleft()
+                results = future.result()
+                _submit()
+                yield from results
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _trim(result: Dict[str, Any], remaining: int) -> Dict[str, Any]:
+    """Cut a file result down to the remaining match budget."""
+    matches = result["matches"][:remaining]
+    return {"file_path": result["file_path"], "matches_count": len(matches), "matches": matches}
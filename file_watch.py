@@ -0,0 +1,251 @@
+"""
+Directory change notifications for the MCP servers.
+Description: Watches a directory tree with Linux inotify (through ctypes, no
+extra dependency) and falls back to periodic stat polling elsewhere or when
+inotify is unavailable. WatchSet watches many single directories through one
+shared inotify instance.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_libc():
+    """Return libc with inotify symbols, or None where inotify is not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch") else None
+
+
+class DirectoryWatcher:
+    """
+    Call on_change(path) whenever a file under directory is created, modified,
+    moved or deleted.
+
+    The callback runs on the watcher thread and receives an absolute path; it
+    should check whether the path still exists. When the path is a directory
+    (a new subdirectory, or the watched directory itself after a kernel event
+    queue overflow) anything beneath it may have changed.
+    """
+
+    def __init__(self, directory: str, on_change: Callable[[str], None], recursive: bool = True,
+                 poll_interval: float = 5.0, force_polling: bool = False):
+        self.directory = os.path.abspath(directory)
+        self.on_change = on_change
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self._libc = None if force_polling else _load_libc()
+        self.mode = "inotify" if self._libc else "polling"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DirectoryWatcher":
+        target = self._run_inotify if self._libc else self._run_polling
+        self._thread = threading.Thread(target=target, name=f"watch:{self.directory}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    # ---------------- inotify ---------------- #
+
+    def _run_inotify(self):
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            self.mode = "polling"
+            return self._run_polling()
+
+        watches: Dict[int, str] = {}
+        try:
+            self._add_watches(fd, self.directory, watches)
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._dispatch(fd, data, watches)
+        finally:
+            os.close(fd)
+
+    def _add_watches(self, fd: int, directory: str, watches: Dict[int, str]):
+        for root, dirs, _files in os.walk(directory):
+            wd = self._libc.inotify_add_watch(fd, os.fsencode(root), _WATCH_MASK)
+            if wd >= 0:
+                watches[wd] = root
+            if not self.recursive:
+                dirs.clear()
+
+    def _dispatch(self, fd: int, data: bytes, watches: Dict[int, str]):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                self.on_change(self.directory)
+                continue
+            if mask & _IN_IGNORED:
+                watches.pop(wd, None)
+                continue
+            parent = watches.get(wd)
+            if parent is None:
+                continue
+            path = os.path.join(parent, os.fsdecode(name)) if name else parent
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and self.recursive:
+                self._add_watches(fd, path, watches)
+            self.on_change(path)
+
+    # ---------------- polling ---------------- #
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+            if not self.recursive:
+                dirs.clear()
+        return snapshot
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            for path in current.keys() | previous.keys():
+                if current.get(path) != previous.get(path):
+                    self.on_change(path)
+            previous = current
+
+
+class WatchSet:
+    """
+    Non-recursive inotify watches on any number of directories, sharing one
+    inotify instance and one reader thread. Calls on_change(path) like
+    DirectoryWatcher, with the watched directory itself for a directory that
+    was deleted or after an event queue overflow.
+
+    add() places the watch before it returns, so a caller that adds a watch
+    and then reads the directory is told about every later change.
+    Raises OSError where inotify is unavailable.
+    """
+
+    def __init__(self, on_change: Callable[[str], None]):
+        self.on_change = on_change
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available on this platform")
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._fd = fd
+        self._lock = threading.Lock()
+        # One watch descriptor per inode: a directory reached through a
+        # symlink shares its wd with the real path.
+        self._directories: Dict[int, Set[str]] = {}
+        self._wds: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watch-set", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._wds)
+
+    def is_watched(self, directory: str) -> bool:
+        return directory in self._wds
+
+    def add(self, directory: str) -> bool:
+        """Watch directory (an absolute path). Returns False if the watch could not be added."""
+        with self._lock:
+            if directory in self._wds:
+                return True
+            if self._stop.is_set():
+                return False
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK | _IN_ONLYDIR)
+            if wd < 0:
+                return False  # missing directory, or the per-user watch limit
+            self._directories.setdefault(wd, set()).add(directory)
+            self._wds[directory] = wd
+            return True
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], 1.0)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._dispatch(data)
+        finally:
+            with self._lock:
+                os.close(self._fd)
+
+    def _dispatch(self, data: bytes):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                with self._lock:
+                    directories: List[str] = list(self._wds)
+                for directory in directories:
+                    self.on_change(directory)
+                continue
+            with self._lock:
+                if mask & _IN_IGNORED:
+                    # The directory is gone (or unmounted); it is no longer watched
+                    directories = list(self._directories.pop(wd, ()))
+                    for directory in directories:
+                        self._wds.pop(directory, None)
+                else:
+                    directories = list(self._directories.get(wd, ()))
+            for directory in directories:
+                self.on_change(os.path.join(directory, os.fsdecode(name)) if name else directory)
@@ -0,0 +1,130 @@
+"""
+.gitignore-style path filtering for the MCP directory tools.
+Description: Parses .gitignore files (and extra patterns given by a caller)
+into compiled rules and answers "is this path ignored?" for a tree walk,
+loading each directory's .gitignore as the walk reaches it.
+"""
+
+import os
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+DEFAULT_IGNORES = (".git/",)
+
+
+class _Rule(NamedTuple):
+    base: str  # directory the pattern is relative to ("" for the root)
+    regex: "re.Pattern"
+    negate: bool
+    dir_only: bool
+
+
+def _translate(pattern: str) -> str:
+    """Regex body for one gitignore glob (without anchoring)."""
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end < 0:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        elif c == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def parse_patterns(lines: Iterable[str], base: str = "") -> List[_Rule]:
+    """Compile gitignore lines whose paths are relative to `base` (a root-relative dir)."""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n\r")
+        if not line.strip() or line.startswith("#"):
+            continue
+        line = line.rstrip(" ") if not line.endswith("\\ ") else line
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = _translate(line)
+        regex = re.compile(("^" if anchored else "^(?:.*/)?") + body + "$")
+        rules.append(_Rule(base, regex, negate, dir_only))
+    return rules
+
+
+class IgnoreRules:
+    """
+    Ignore decisions for paths under root, following .gitignore semantics:
+    patterns apply relative to the directory of their .gitignore, later rules
+    override earlier ones, "!" re-includes, and a trailing "/" matches only
+    directories. Call load_directory() for each directory as the walk enters it.
+    """
+
+    def __init__(self, root: str, extra_patterns: Optional[Iterable[str]] = None,
+                 use_gitignore: bool = True):
+        self.root = os.path.abspath(root)
+        self.use_gitignore = use_gitignore
+        self._rules: List[_Rule] = parse_patterns(DEFAULT_IGNORES)
+        if extra_patterns:
+            self._rules.extend(parse_patterns(extra_patterns))
+        self._loaded = set()
+
+    def load_directory(self, directory: str):
+        """Add the rules from directory's .gitignore, if any."""
+        if not self.use_gitignore or directory in self._loaded:
+            return
+        self._loaded.add(directory)
+        try:
+            with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="replace") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        base = os.path.relpath(directory, self.root).replace(os.sep, "/")
+        self._rules.extend(parse_patterns(lines, "" if base == "." else base))
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """Whether path (absolute, under root) is ignored."""
+        rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+        ignored = False
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.base:
+                if not rel.startswith(rule.base + "/"):
+                    continue
+                candidate = rel[len(rule.base) + 1:]
+            else:
+                candidate = rel
+            if rule.regex.match(candidate):
+                ignored = not rule.negate
+        return ignored
@@ -1,32 +1,106 @@
 
 from mcp.server.fastmcp import FastMCP
 import os
-import tempfile
-import threading
+from typing import Dict, Optional
+import file_edits
+import path_locks
+import text_store
 # Create MCP server
 mcp = FastMCP("Demo")
 
 
 _base_dir = os.path.dirname(__file__)
-_file_lock = threading.Lock()
+_path_locks = path_locks.PathLocks()
+_hash_cache = file_edits.HashCache()
+_MAX_FULL_READ = 16 * 1024 * 1024  # larger files are returned a window at a time
+_DEFAULT_WINDOW_LINES = 2000
 
 @mcp.tool()
-def read_code(file_path: str) -> str:
+def read_code(file_path: str, if_none_match: Optional[str] = None,
+              line_start: Optional[int] = None, line_end: Optional[int] = None,
+              byte_offset: Optional[int] = None, byte_length: Optional[int] = None) -> dict:
     """
-    Read the entire file at file_path (relative to this module).
-    Logs only metadata, returns full content.
+    Read the file at file_path (relative to this module).
+    Returns the content with an etag (SHA-256 of the file bytes, also usable as
+    apply_edit's base_hash). If if_none_match equals the current etag, returns
+    {"unchanged": true} without the content.
+    Pass line_start/line_end (1-based, inclusive) or byte_offset/byte_length to
+    read a window through mmap and a persisted line index; windowed reads report
+    total_lines and size. Files over 16 MB are always read a window at a time.
+    Windowed reads return a weak etag ("W/inode-size-mtime", from a stat()
+    instead of a hash of the whole file) that if_none_match also accepts; it
+    is not an apply_edit base_hash.
+    Logs only metadata.
     """
     abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
     if not os.path.exists(abs_path):
-        return f"File not found: {abs_path}"
+        return {"error": f"File not found: {abs_path}"}
+
+    windowed = line_start is not None or line_end is not None or byte_offset is not None
+    if windowed or os.path.getsize(abs_path) > _MAX_FULL_READ:
+        return _read_code_window(abs_path, if_none_match, line_start, line_end, byte_offset, byte_length)
 
-    with _file_lock:
-        with open(abs_path, "r", encoding="utf-8") as f:
-            content = f.read()
+    with _path_locks.read(abs_path):
+        stat = os.stat(abs_path)
+        etag = _hash_cache.get(abs_path, stat)
+        data = None
+        if etag is None or etag != if_none_match:
+            with open(abs_path, "rb") as f:
+                data = f.read()
+            etag = file_edits.content_hash(data)
+            _hash_cache.put(abs_path, stat, etag)
 
+    if etag == if_none_match:
+        print(f"[read_code] path={abs_path} unchanged")
+        return {"path": abs_path, "etag": etag, "unchanged": True}
+
+    content = data.decode("utf-8")
     # Log only metadata
     print(f"[read_code] path={abs_path} len={len(content)} chars")
-    return content or ""
+    return {"path": abs_path, "etag": etag, "size": len(data), "content": content}
+
+
+def _read_code_window(abs_path: str, if_none_match: Optional[str], line_start: Optional[int],
+                      line_end: Optional[int], byte_offset: Optional[int], byte_length: Optional[int]) -> dict:
+    """Line- or byte-window read for read_code; cost scales with the window, not the file."""
+    try:
+        with _path_locks.read(abs_path):
+            stat = os.stat(abs_path)
+            # Hashing a growing log on every window would cost O(file); a stat() doesn't
+            etag = f"W/{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}"
+            if if_none_match is not None and if_none_match in (etag, _hash_cache.get(abs_path, stat)):
+                print(f"[read_code] path={abs_path} unchanged")
+                return {"path": abs_path, "etag": etag, "unchanged": True}
+
+            index = text_store.get_line_index(abs_path)
+            totals = index.sync()
+            result = {"path": abs_path, "etag": etag, "size": totals["bytes"], "total_lines": totals["lines"]}
+
+            if byte_offset is not None:
+                length = byte_length if byte_length is not None else 64 * 1024
+                if byte_offset < 0 or length < 0:
+                    return {"error": "byte_offset and byte_length must not be negative"}
+                content, start, end = text_store.read_utf8_range(abs_path, byte_offset, length)
+                result.update(byte_offset=start, byte_end=end, content=content)
+                if end < totals["bytes"]:
+                    result["next_byte_offset"] = end
+            else:
+                first = line_start or 1
+                last = line_end if line_end is not None else first + _DEFAULT_WINDOW_LINES - 1
+                if not totals["lines"]:
+                    result.update(content="")
+                    return result
+                start, end, last = index.line_range(first, last)
+                result.update(line_start=first, line_end=last,
+                              content=text_store.read_byte_range(abs_path, start, end))
+                if last < totals["lines"]:
+                    result["next_line"] = last + 1
+    except ValueError as e:
+        return {"error": str(e)}
+
+    # Log only metadata
+    print(f"[read_code] path={abs_path} window={len(result['content'])} chars of {result['size']} bytes")
+    return result
 
 
 @mcp.tool()
@@ -38,19 +112,71 @@ def write_code(file_path: str, content: str) -> str:
     abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
     os.makedirs(os.path.dirname(abs_path), exist_ok=True)
 
-    with _file_lock:
-        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(abs_path), prefix=".tmp_", text=True)
-        try:
-            with os.fdopen(fd, "w", encoding="utf-8") as tmpf:
-                tmpf.write(content)
-            os.replace(tmp_path, abs_path)  # atomic replace
-        finally:
-            if os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+    with _path_locks.write(abs_path):
+        file_edits.atomic_write(abs_path, content)
 
     # Log only metadata
     print(f"[write_code] path={abs_path} len={len(content)} chars")
     return f"File written successfully: {abs_path}"
+
+
+@mcp.tool()
+def write_many(files: Dict[str, str]) -> str:
+    """
+    Write several files as one transaction: files maps file_path (relative to
+    this module) to content. All files are staged in temp files, fsynced in one
+    batch and renamed into place together; if any step fails, no file is left
+    changed. Logs only metadata, returns success message.
+    """
+    if not files:
+        return "Error: No files provided to write"
+
+    targets: Dict[str, str] = {}
+    for file_path, content in files.items():
+        abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
+        targets[os.path.abspath(abs_path)] = content
+
+    try:
+        with _path_locks.acquire(write=targets):
+            file_edits.atomic_write_many(targets)
+    except OSError as e:
+        print(f"[write_many] failed files={len(targets)} error={e}")
+        return f"Error writing files (no changes were made): {str(e)}"
+
+    # Log only metadata
+    total = sum(len(content) for content in targets.values())
+    print(f"[write_many] files={len(targets)} len={total} chars")
+    return f"{len(targets)} files written successfully: " + ", ".join(targets)
+
+
+@mcp.tool()
+def apply_edit(file_path: str, base_hash: str, diff: Optional[str] = None,
+               start_line: Optional[int] = None, end_line: Optional[int] = None,
+               replacement: str = "") -> str:
+    """
+    Apply a small edit to file_path instead of rewriting the whole file.
+    Either pass a unified diff, or start_line/end_line (1-based, inclusive) and
+    the replacement text for that range. The edit is only applied if base_hash
+    (SHA-256 hex of the current file bytes) still matches, and is written
+    atomically using a temp file + os.replace.
+    Logs only metadata, returns a summary with the new hash.
+    """
+    abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
+    if not os.path.exists(abs_path):
+        return f"File not found: {abs_path}"
+    if (diff is None) == (start_line is None):
+        return "Error: pass either diff or start_line/end_line"
+
+    with _path_locks.write(abs_path):
+        try:
+            hunks, added, removed, new_hash = file_edits.edit_file(
+                abs_path, base_hash, diff, start_line, end_line, replacement)
+        except file_edits.StaleBaseHash as e:
+            return (f"Error: base_hash does not match the current content of {abs_path} "
+                    f"(current hash: {e.current}). Re-read the file and rebuild the edit.")
+        except ValueError as e:
+            return f"Error applying edit to {abs_path}: {e}"
+
+    # Log only metadata
+    print(f"[apply_edit] path={abs_path} hunks={hunks} +{added} -{removed}")
+    return f"Edit applied to {abs_path}: {hunks} hunk(s), +{added} -{removed} lines. New hash: {new_hash}"
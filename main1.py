@@ -6,13 +6,22 @@ Run with:
 
 from mcp.server.fastmcp import FastMCP
 import os
+import hashlib
+import tempfile
 import pdfplumber
+import pdf_tools
+import cache_paths
+import notes_store
+import text_store
+import file_edits
+import stat_cache
 from PIL import Image as PILImage
 import io
 import base64
 import logging
+import threading
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import json
 from pathlib import Path
 
@@ -34,12 +43,22 @@ mcp = FastMCP("Enhanced Demo Server")
 class Config:
     BASE_DIR = Path(__file__).parent
     NOTES_FILE = BASE_DIR / "Notes.txt"
+    NOTES_INDEX_FILE = cache_paths.CACHE_DIR / "notes_fts.db"
+    NOTES_FLUSH_INTERVAL = float(os.environ.get("NOTES_FLUSH_INTERVAL", 0.005))  # seconds
+    NOTES_FSYNC = os.environ.get("NOTES_FSYNC", "0") == "1"
+    NOTES_PROMPT_TOKEN_BUDGET = int(os.environ.get("NOTES_PROMPT_TOKEN_BUDGET", 3000))  # analyze_notes prompt size
     TEXT_FILE = BASE_DIR / "New.txt" 
+    TEXT_READ_BYTES = 64 * 1024  # default read_txt window
+    TEXT_READ_LINES = 500
+    SUMMARY_MAX_BYTES = 256 * 1024  # text_summary prompt content
     PDF_FILE = BASE_DIR / "Tendernotice_1.pdf"
     IMAGE_FILE = BASE_DIR / "imgg.png"
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     THUMBNAIL_SIZE = (150, 150)  # Improved thumbnail size
     SUPPORTED_IMAGE_FORMATS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff'}
+    PREVIEW_CACHE_DIR = cache_paths.CACHE_DIR / "previews"
+    PREVIEW_FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+    MAX_PREVIEW_PAGES = 10
 
 def ensure_file(path: Path, create_dirs: bool = True) -> bool:
     """
@@ -66,18 +85,102 @@ def validate_file_size(path: Path) -> bool:
         return False
 
 def get_file_info(path: Path) -> dict:
-    """Get file metadata information."""
+    """Get file metadata information (served from the shared stat cache)."""
+    cached = stat_cache.get_stat_cache().lookup(str(path))
+    if cached.stat is None:
+        return {"exists": False, "error": cached.error, "cache_age": stat_cache.cache_age(cached.cached_at)}
+    return {
+        "exists": True,
+        "size": cached.stat.st_size,
+        "modified": datetime.fromtimestamp(cached.stat.st_mtime).isoformat(),
+        "readable": cached.readable,
+        "writable": cached.writable,
+        "cache_age": stat_cache.cache_age(cached.cached_at)
+    }
+
+def parse_thumbnail_size(size: str) -> Tuple[int, int]:
+    """
+    Parse a "WIDTHxHEIGHT" thumbnail size with values 1-1000.
+    Raises ValueError with a user-facing message on bad input.
+    """
     try:
-        stat = path.stat()
-        return {
-            "exists": True,
-            "size": stat.st_size,
-            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            "readable": os.access(path, os.R_OK),
-            "writable": os.access(path, os.W_OK)
-        }
-    except Exception as e:
-        return {"exists": False, "error": str(e)}
+        width, height = map(int, size.split('x'))
+    except ValueError:
+        raise ValueError("Invalid size format. Use 'WIDTHxHEIGHT' (e.g., '150x150')")
+    if width <= 0 or height <= 0 or width > 1000 or height > 1000:
+        raise ValueError("Invalid size. Use format 'WIDTHxHEIGHT' with values 1-1000")
+    return width, height
+
+def encode_thumbnail(img: PILImage.Image, width: int, height: int, image_format: str = "PNG") -> Tuple[bytes, Tuple[int, int]]:
+    """Shrink an image to fit width x height and encode it. Returns (bytes, final size)."""
+    # Convert to RGB if necessary (for PNG with transparency)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGB')
+    
+    img.thumbnail((width, height), PILImage.Resampling.LANCZOS)
+    
+    buffer = io.BytesIO()
+    img.save(buffer, format=image_format, optimize=True)
+    return buffer.getvalue(), img.size
+
+def parse_page_list(pages: str, page_count: int) -> List[int]:
+    """Parse a page selection like "1,3-5" into sorted page numbers within 1..page_count."""
+    selected = set()
+    for part in pages.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        first, last = int(start), int(end or start)
+        if first < 1 or last < first or last > page_count:
+            raise ValueError(f"Invalid page selection '{part}' (document has {page_count} pages)")
+        selected.update(range(first, last + 1))
+    return sorted(selected)
+
+# The notes index (SQLite) and writer (a background thread) are created on first
+# use: pdf_tools' worker processes re-import this script and need neither.
+_notes_lock = threading.Lock()
+_notes_index: Optional[notes_store.NotesIndex] = None
+_notes_writer: Optional[notes_store.NotesWriter] = None
+
+def get_notes_index() -> notes_store.NotesIndex:
+    """Full-text sidecar index over Notes.txt, kept in step with add_notes."""
+    global _notes_index
+    with _notes_lock:
+        if _notes_index is None:
+            _notes_index = notes_store.NotesIndex(Config.NOTES_FILE, Config.NOTES_INDEX_FILE)
+        return _notes_index
+
+# Rolling per-day/per-week summaries behind the analyze_notes prompt
+notes_digest = notes_store.NotesDigest(Config.NOTES_FILE)
+
+def _after_notes_commit():
+    """Bring derived notes data up to date after the writer commits a batch."""
+    stat_cache.note_change(str(Config.NOTES_FILE))
+    get_notes_index().sync()
+    notes_digest.sync()
+
+def get_notes_writer() -> notes_store.NotesWriter:
+    """Every note goes through this single writer, which batches concurrent appends."""
+    global _notes_writer
+    with _notes_lock:
+        if _notes_writer is None:
+            _notes_writer = notes_store.NotesWriter(
+                Config.NOTES_FILE,
+                flush_interval=Config.NOTES_FLUSH_INTERVAL,
+                fsync=Config.NOTES_FSYNC,
+                on_commit=_after_notes_commit
+            )
+        return _notes_writer
+
+# Word/character counts for New.txt, recounted only for the bytes that changed
+text_stats = text_store.TextStats(Config.TEXT_FILE)
+
+def format_note(message: str, add_timestamp: bool) -> str:
+    """Prefix a note with the current timestamp when requested."""
+    if not add_timestamp:
+        return message
+    return f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}"
 
 # ---------------- ENHANCED TOOLS ---------------- #
 
@@ -97,11 +200,7 @@ def add_notes(message: str, add_timestamp: bool = True) -> str:
         if not ensure_file(Config.NOTES_FILE):
             return "Error: Could not create notes file"
         
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}" if add_timestamp else message
-        
-        with open(Config.NOTES_FILE, "a", encoding="utf-8") as f:
-            f.write(formatted_message + "\n")
+        get_notes_writer().append([format_note(message, add_timestamp)])
         
         logger.info(f"Added note: {message[:50]}...")
         return f"✓ Note saved successfully: {message[:100]}{'...' if len(message) > 100 else ''}"
@@ -110,6 +209,33 @@ def add_notes(message: str, add_timestamp: bool = True) -> str:
         logger.error(f"Failed to add note: {e}")
         return f"Error adding note: {str(e)}"
 
+@mcp.tool()
+def add_notes_many(messages: List[str], add_timestamp: bool = True) -> str:
+    """
+    Append many notes to Notes.txt in a single write.
+    
+    Args:
+        messages: The note contents to add; empty entries are skipped
+        add_timestamp: Whether to prepend timestamp to each note (default: True)
+    """
+    try:
+        notes = [format_note(message, add_timestamp) for message in messages if message.strip()]
+        if not notes:
+            return "Error: No non-empty notes to add"
+        
+        if not ensure_file(Config.NOTES_FILE):
+            return "Error: Could not create notes file"
+        
+        get_notes_writer().append(notes)
+        
+        skipped = len(messages) - len(notes)
+        logger.info(f"Added {len(notes)} notes in one batch")
+        return f"✓ {len(notes)} notes saved successfully" + (f" ({skipped} empty skipped)" if skipped else "")
+    
+    except Exception as e:
+        logger.error(f"Failed to add notes: {e}")
+        return f"Error adding notes: {str(e)}"
+
 @mcp.tool()
 def read_notes(limit: int = 10) -> str:
     """
@@ -122,13 +248,16 @@ def read_notes(limit: int = 10) -> str:
         if not Config.NOTES_FILE.exists():
             return "No notes file found"
         
-        with open(Config.NOTES_FILE, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
+        if limit > 0:
+            # Reads backwards from the end: cost depends on limit, not file size
+            recent_notes = notes_store.tail_lines(Config.NOTES_FILE, limit)
+        else:
+            with open(Config.NOTES_FILE, "r", encoding="utf-8") as f:
+                recent_notes = [line.strip() for line in f if line.strip()]
         
-        if not lines:
+        if not recent_notes:
             return "No notes found"
         
-        recent_notes = lines[-limit:] if limit > 0 else lines
         return "\n".join(recent_notes)
     
     except Exception as e:
@@ -136,12 +265,16 @@ def read_notes(limit: int = 10) -> str:
         return f"Error reading notes: {str(e)}"
 
 @mcp.tool()
-def search_notes(query: str) -> str:
+def search_notes(query: str, since: Optional[str] = None, until: Optional[str] = None, limit: int = 50) -> str:
     """
-    Search for notes containing the specified query.
+    Search for notes containing the specified query, best matches first.
+    Served from a full-text index, so cost does not grow with the size of Notes.txt.
     
     Args:
         query: Search term to look for in notes
+        since: Only notes on or after this date, "YYYY-MM-DD" (optional)
+        until: Only notes on or before this date, "YYYY-MM-DD" (optional)
+        limit: Maximum number of notes to return (default: 50)
     """
     try:
         if not query.strip():
@@ -150,27 +283,39 @@ def search_notes(query: str) -> str:
         if not Config.NOTES_FILE.exists():
             return "No notes file found"
         
-        with open(Config.NOTES_FILE, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
+        notes_index = get_notes_index()
+        notes_index.sync()
+        result = notes_index.search(query.strip(), since, until, limit)
         
-        matches = [line for line in lines if query.lower() in line.lower()]
-        
-        if not matches:
+        if not result["matches"]:
             return f"No notes found containing '{query}'"
         
-        return f"Found {len(matches)} notes containing '{query}':\n" + "\n".join(matches)
+        shown = f" (showing {len(result['matches'])})" if result["total"] > len(result["matches"]) else ""
+        return f"Found {result['total']} notes containing '{query}'{shown}:\n" + "\n".join(result["matches"])
     
     except Exception as e:
         logger.error(f"Failed to search notes: {e}")
         return f"Error searching notes: {str(e)}"
 
 @mcp.tool()
-def read_pdf(extract_metadata: bool = False) -> str:
+def read_pdf(extract_metadata: bool = False, page_start: int = 1, page_end: Optional[int] = None,
+             max_chars: Optional[int] = None, cursor: Optional[str] = None, backend: str = "layout",
+             stream: bool = False, memory_budget_mb: Optional[int] = None) -> str:
     """
     Read and return text from PDF file with optional metadata.
+    Large documents can be paged through with page_start/page_end and max_chars;
+    a truncated response ends with a cursor to pass back for the next window.
     
     Args:
         extract_metadata: Whether to include PDF metadata (default: False)
+        page_start: First page to return, 1-based (default: 1)
+        page_end: Last page to return (default: last page)
+        max_chars: Stop after this many characters of page text (default: no limit)
+        cursor: Continuation cursor from a previous truncated response
+        backend: "layout" (pdfplumber, default), "fast" (PyPDF2) or "auto" (fast, falling
+            back to layout for pages with empty or garbled output)
+        stream: Extract page by page with bounded memory and report peak memory use
+        memory_budget_mb: RSS limit for stream mode; extraction stops with a cursor when exceeded
     """
     try:
         if not Config.PDF_FILE.exists():
@@ -179,49 +324,154 @@ def read_pdf(extract_metadata: bool = False) -> str:
         if not validate_file_size(Config.PDF_FILE):
             return "Error: PDF file too large"
         
-        result = []
-        
-        with pdfplumber.open(Config.PDF_FILE) as pdf:
-            if extract_metadata and pdf.metadata:
-                result.append(f"PDF Metadata: {json.dumps(pdf.metadata, indent=2, default=str)}\n")
-            
-            result.append(f"Total pages: {len(pdf.pages)}\n")
-            
-            text_content = ""
-            for i, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text() or ""
-                if page_text.strip():
-                    text_content += f"\n--- Page {i} ---\n{page_text}\n"
-            
-            if text_content.strip():
-                result.append(text_content)
-            else:
-                result.append("No readable text found in PDF")
+        result = pdf_tools.read_pdf_text(
+            Config.PDF_FILE, extract_metadata, page_start=page_start, page_end=page_end, max_chars=max_chars,
+            cursor=cursor, backend=backend, stream=stream, memory_budget_mb=memory_budget_mb,
+        )
         
-        logger.info(f"Successfully read PDF with {len(pdf.pages)} pages")
-        return "".join(result)
+        logger.info(f"Successfully read PDF (cache: {pdf_tools.get_cache().stats()})")
+        return result
     
     except Exception as e:
         logger.error(f"Failed to read PDF: {e}")
         return f"Error reading PDF: {str(e)}"
 
 @mcp.tool()
-def read_txt() -> str:
-    """Read and return text from New.txt with file info."""
+def pdf_info() -> str:
+    """
+    Return page count and metadata of the PDF file without extracting its text.
+    Much faster than read_pdf(extract_metadata=True) when the text is not needed.
+    """
+    try:
+        if not Config.PDF_FILE.exists():
+            return "PDF file not found"
+        
+        return json.dumps(pdf_tools.pdf_info(Config.PDF_FILE), indent=2)
+    
+    except Exception as e:
+        logger.error(f"Failed to read PDF info: {e}")
+        return f"Error reading PDF info: {str(e)}"
+
+@mcp.tool()
+def preview_pdf(pages: str = "1", size: str = "300x300", image_format: str = "png") -> str:
+    """
+    Render PDF pages to small images and return them as base64 data URIs (JSON list).
+    Renders are cached by content, so repeat previews of an unchanged PDF skip rasterisation.
+    
+    Args:
+        pages: Pages to render, e.g. "1" or "1,3-5" (default: "1", at most 10 pages)
+        size: Maximum preview size in format "WIDTHxHEIGHT" (default: "300x300")
+        image_format: "png" or "webp" (default: "png")
+    """
+    try:
+        try:
+            width, height = parse_thumbnail_size(size)
+        except ValueError as e:
+            return f"Error: {e}"
+        
+        image_format = image_format.lower()
+        if image_format not in Config.PREVIEW_FORMATS:
+            return f"Error: Unsupported preview format. Supported: {', '.join(Config.PREVIEW_FORMATS)}"
+        
+        if not Config.PDF_FILE.exists():
+            return "PDF file not found"
+        
+        page_numbers = parse_page_list(pages, pdf_tools.pdf_info(Config.PDF_FILE)["pages"])
+        if not page_numbers or len(page_numbers) > Config.MAX_PREVIEW_PAGES:
+            return f"Error: Select between 1 and {Config.MAX_PREVIEW_PAGES} pages"
+        
+        # Content-addressed: the key covers the PDF bytes and every render setting
+        digest = pdf_tools.get_cache().content_hash(Config.PDF_FILE)
+        Config.PREVIEW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        previews, to_render = {}, []
+        for page_no in page_numbers:
+            key = hashlib.sha256(f"{digest}:{page_no}:{width}x{height}".encode()).hexdigest()
+            cache_file = Config.PREVIEW_CACHE_DIR / f"{key}.{image_format}"
+            if cache_file.exists():
+                previews[page_no] = (cache_file.read_bytes(), True)
+            else:
+                to_render.append((page_no, cache_file))
+        
+        if to_render:
+            with pdfplumber.open(Config.PDF_FILE) as pdf:
+                for page_no, cache_file in to_render:
+                    page = pdf.pages[page_no - 1]
+                    # Rasterise just large enough for the requested preview size
+                    resolution = max(36, 72 * max(width / page.width, height / page.height))
+                    img = page.to_image(resolution=resolution).original
+                    data, _ = encode_thumbnail(img, width, height, Config.PREVIEW_FORMATS[image_format])
+                    
+                    fd, tmp_path = tempfile.mkstemp(dir=Config.PREVIEW_CACHE_DIR, prefix=".tmp_")
+                    with os.fdopen(fd, "wb") as tmpf:
+                        tmpf.write(data)
+                    os.replace(tmp_path, cache_file)
+                    previews[page_no] = (data, False)
+        
+        result = [
+            {
+                "page": page_no,
+                "cached": cached,
+                "image": f"data:image/{image_format};base64,{base64.b64encode(data).decode('utf-8')}"
+            }
+            for page_no, (data, cached) in sorted(previews.items())
+        ]
+        logger.info(f"Rendered {len(to_render)} PDF previews ({len(result) - len(to_render)} from cache)")
+        return json.dumps(result)
+    
+    except Exception as e:
+        logger.error(f"Failed to render PDF preview: {e}")
+        return f"Error rendering PDF preview: {str(e)}"
+
+@mcp.tool()
+def read_txt(offset: int = 0, length: Optional[int] = None,
+             line_start: Optional[int] = None, line_end: Optional[int] = None) -> str:
+    """
+    Read text from New.txt with file info, a window at a time.
+    
+    Args:
+        offset: Byte offset to start reading from (default: 0)
+        length: Maximum bytes to return (default: 65536)
+        line_start: First line to return (1-based); switches to reading by lines
+        line_end: Last line to return (default: line_start + 499)
+    """
     try:
         if not ensure_file(Config.TEXT_FILE):
             return "Error: Could not access text file"
         
-        with open(Config.TEXT_FILE, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-        
-        if not content:
+        stats = text_stats.sync()
+        if not stats["chars"]:
             return "Text file exists but is empty"
         
-        word_count = len(content.split())
-        char_count = len(content)
-        
-        return f"Content ({word_count} words, {char_count} characters):\n\n{content}"
+        header = f"Content ({stats['words']} words, {stats['chars']} characters"
+        
+        if line_start is not None or line_end is not None:
+            line_start = max(line_start or 1, 1)
+            if line_end is None:
+                line_end = line_start + Config.TEXT_READ_LINES - 1
+            if line_end < line_start:
+                return "Error: line_end must not be before line_start"
+            lines, next_line = text_stats.read_lines(line_start, line_end)
+            if not lines:
+                return f"Error: line_start {line_start} is past the end of the file ({stats['lines']} lines)"
+            result = f"{header}, {stats['lines']} lines):\nShowing lines {line_start}-{next_line - 1}\n\n" + "\n".join(lines)
+            if next_line <= stats["lines"]:
+                result += f"\n\n[More text available. Call read_txt again with line_start={next_line}]"
+            return result
+        
+        length = length or Config.TEXT_READ_BYTES
+        if offset < 0 or length < 0:
+            return "Error: offset and length must not be negative"
+        if offset >= stats["bytes"]:
+            return f"Error: offset {offset} is past the end of the file ({stats['bytes']} bytes)"
+        content, start, end = text_stats.read_bytes(offset, length)
+        
+        if start == 0 and end >= stats["bytes"]:
+            return f"{header}):\n\n{content.strip()}"
+        
+        result = f"{header}, {stats['bytes']} bytes):\nShowing bytes {start}-{end}\n\n{content}"
+        if end < stats["bytes"]:
+            result += f"\n\n[More text available. Call read_txt again with offset={end}]"
+        return result
     
     except Exception as e:
         logger.error(f"Failed to read text file: {e}")
@@ -240,12 +490,11 @@ def write_txt(content: str, append: bool = False) -> str:
         if not ensure_file(Config.TEXT_FILE):
             return "Error: Could not create text file"
         
-        mode = "a" if append else "w"
-        with open(Config.TEXT_FILE, mode, encoding="utf-8") as f:
-            if append:
+        if append:
+            with open(Config.TEXT_FILE, "a", encoding="utf-8") as f:
                 f.write("\n" + content)
-            else:
-                f.write(content)
+        else:
+            file_edits.atomic_write(str(Config.TEXT_FILE), content)
         
         action = "appended to" if append else "written to"
         logger.info(f"Content {action} text file")
@@ -254,6 +503,42 @@ def write_txt(content: str, append: bool = False) -> str:
     except Exception as e:
         logger.error(f"Failed to write to text file: {e}")
         return f"Error writing to text file: {str(e)}"
+    finally:
+        stat_cache.note_change(str(Config.TEXT_FILE))
+
+@mcp.tool()
+def edit_txt(base_hash: str, diff: Optional[str] = None, start_line: Optional[int] = None,
+             end_line: Optional[int] = None, replacement: str = "") -> str:
+    """
+    Apply a small edit to New.txt instead of rewriting it with write_txt.
+    
+    Args:
+        base_hash: SHA-256 hex of the current file bytes; the edit is refused if it changed
+        diff: Unified diff to apply
+        start_line: First line to replace (1-based), instead of a diff
+        end_line: Last line to replace (default: start_line; start_line - 1 inserts)
+        replacement: New text for the line range
+    """
+    try:
+        if not Config.TEXT_FILE.exists():
+            return "Error: Text file does not exist"
+        if (diff is None) == (start_line is None):
+            return "Error: Pass either diff or start_line/end_line"
+        
+        hunks, added, removed, new_hash = file_edits.edit_file(
+            str(Config.TEXT_FILE), base_hash, diff, start_line, end_line, replacement)
+        logger.info(f"Edit applied to text file: {hunks} hunk(s), +{added} -{removed} lines")
+        return f"✓ Edit applied to New.txt: +{added} -{removed} lines. New hash: {new_hash}"
+    
+    except file_edits.StaleBaseHash as e:
+        return f"Error: base_hash does not match New.txt (current hash: {e.current}). Re-read the file and rebuild the edit."
+    except ValueError as e:
+        return f"Error applying edit: {str(e)}"
+    except Exception as e:
+        logger.error(f"Failed to edit text file: {e}")
+        return f"Error editing text file: {str(e)}"
+    finally:
+        stat_cache.note_change(str(Config.TEXT_FILE))
 
 @mcp.tool()
 def create_thumbnail(image_path: str, size: str = "150x150") -> str:
@@ -267,11 +552,9 @@ def create_thumbnail(image_path: str, size: str = "150x150") -> str:
     try:
         # Parse size
         try:
-            width, height = map(int, size.split('x'))
-            if width <= 0 or height <= 0 or width > 1000 or height > 1000:
-                return "Error: Invalid size. Use format 'WIDTHxHEIGHT' with values 1-1000"
-        except ValueError:
-            return "Error: Invalid size format. Use 'WIDTHxHEIGHT' (e.g., '150x150')"
+            width, height = parse_thumbnail_size(size)
+        except ValueError as e:
+            return f"Error: {e}"
         
         # Resolve path
         if os.path.isabs(image_path):
@@ -291,17 +574,10 @@ def create_thumbnail(image_path: str, size: str = "150x150") -> str:
         
         # Create thumbnail
         with PILImage.open(abs_path) as img:
-            # Convert to RGB if necessary (for PNG with transparency)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-            
-            img.thumbnail((width, height), PILImage.Resampling.LANCZOS)
+            data, (thumb_width, thumb_height) = encode_thumbnail(img, width, height)
+            base64_str = base64.b64encode(data).decode("utf-8")
             
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG", optimize=True)
-            base64_str = base64.b64encode(buffer.getvalue()).decode("utf-8")
-            
-            logger.info(f"Created thumbnail for {abs_path.name} ({img.size[0]}x{img.size[1]})")
+            logger.info(f"Created thumbnail for {abs_path.name} ({thumb_width}x{thumb_height})")
             return f"data:image/png;base64,{base64_str}"
     
     except Exception as e:
@@ -334,8 +610,7 @@ def get_latest_note() -> str:
         if not ensure_file(Config.NOTES_FILE):
             return "No notes file available"
         
-        with open(Config.NOTES_FILE, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
+        lines = notes_store.tail_lines(Config.NOTES_FILE, 1)
         
         return lines[-1] if lines else "No notes found"
     
@@ -357,19 +632,21 @@ def text_summary() -> str:
         if not ensure_file(Config.TEXT_FILE):
             return "No content file available for summarization."
         
-        with open(Config.TEXT_FILE, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-        
-        if not content:
+        stats = text_stats.sync()
+        if not stats["chars"]:
             return "No content found to summarize in New.txt"
         
-        word_count = len(content.split())
+        content, _, end = text_stats.read_bytes(0, Config.SUMMARY_MAX_BYTES)
+        content = content.strip()
+        if end < stats["bytes"]:
+            content += f"\n\n[Text truncated at {end} of {stats['bytes']} bytes; use read_txt with offset={end} for the rest]"
         
         return f"""Please provide a comprehensive summary of the following text:
 
 Text Statistics:
-- Word count: {word_count}
-- Character count: {len(content)}
+- Word count: {stats['words']}
+- Character count: {stats['chars']}
+- Line count: {stats['lines']}
 
 Content:
 {content}
@@ -385,28 +662,21 @@ Please include:
         return f"Error creating summary prompt: {str(e)}"
 
 @mcp.prompt("analyze_notes")
-def analyze_notes() -> str:
-    """Provide a prompt for analyzing all notes."""
+def analyze_notes(token_budget: Optional[int] = None) -> str:
+    """
+    Provide a prompt for analyzing all notes.
+    Built from rolling per-day/per-week digests plus the most recent notes, so the
+    prompt stays within token_budget (default: 3000) however large Notes.txt grows.
+    """
     try:
         if not Config.NOTES_FILE.exists():
             return "No notes available for analysis."
         
-        with open(Config.NOTES_FILE, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
-        
-        if not lines:
+        notes_digest.sync()
+        if not notes_digest.total:
             return "No notes found for analysis."
         
-        return f"""Please analyze the following collection of {len(lines)} notes:
-
-{chr(10).join(lines)}
-
-Please provide:
-1. Common themes and patterns
-2. Chronological trends (if timestamps are present)
-3. Key insights and observations
-4. Suggestions for organization or follow-up actions
-"""
+        return notes_digest.build_prompt(token_budget or Config.NOTES_PROMPT_TOKEN_BUDGET)
     
     except Exception as e:
         logger.error(f"Failed to create notes analysis prompt: {e}")
@@ -434,7 +704,7 @@ def main():
         status = "exists" if path.exists() else "missing"
         logger.info(f"  {name}: {status}")
     
-    logger.info("Server ready - available tools: add_notes, read_notes, search_notes, read_pdf, read_txt, write_txt, create_thumbnail, get_file_status")
+    logger.info("Server ready - available tools: add_notes, add_notes_many, read_notes, search_notes, read_pdf, pdf_info, preview_pdf, read_txt, write_txt, edit_txt, create_thumbnail, get_file_status")
     mcp.run()
 
 if __name__ == "__main__":
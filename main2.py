@@ -8,55 +8,112 @@ code analysis, data processing, and database management capabilities.
 
 from mcp.server.fastmcp import FastMCP
 import os
+import re
 import shutil
+import stat
 import json
 import csv
 import sqlite3
 import ast
-import threading
+import fnmatch
+import ignore_rules
+import trigram_index
+import file_search
+import path_locks
+import stat_cache
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 
 # Create MCP server
 mcp = FastMCP("Advanced Demo Server")
 
 _base_dir = os.path.dirname(__file__)
-_file_lock = threading.Lock()
+_path_locks = path_locks.PathLocks()
 
 # =============================================
 # ADVANCED FILE OPERATIONS
 # =============================================
 
+_LIST_FIELDS = ("name", "path", "is_file", "is_directory", "size", "modified", "created", "permissions")
+_LIST_SORT_KEYS = {
+    "name": lambda e: e.name,
+    "size": lambda e: e.stat.st_size,
+    "modified": lambda e: e.stat.st_mtime,
+    "created": lambda e: e.stat.st_ctime,
+    "type": lambda e: (not e.is_dir, e.name),  # directories first
+}
+
+
+def _entry_field(entry: "stat_cache.CachedEntry", field: str) -> Any:
+    """One list_files output field for a directory entry."""
+    if field == "name":
+        return entry.name
+    if field == "path":
+        return entry.path
+    if field == "is_file":
+        return entry.is_file
+    if field == "is_directory":
+        return entry.is_dir
+    if field == "size":
+        return entry.stat.st_size
+    if field == "modified":
+        return datetime.fromtimestamp(entry.stat.st_mtime).isoformat()
+    if field == "created":
+        return datetime.fromtimestamp(entry.stat.st_ctime).isoformat()
+    return oct(entry.stat.st_mode)[-3:]
+
+
 @mcp.tool()
-def list_files(directory: str = ".") -> List[Dict[str, Any]]:
-    """List all files in a directory with detailed metadata."""
+def list_files(directory: str = ".", pattern: Optional[str] = None, sort_by: str = "name",
+               descending: bool = False, offset: int = 0, limit: int = 500,
+               fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    List files in a directory with detailed metadata, a page at a time.
+    
+    Args:
+        directory: Directory to list
+        pattern: Glob pattern to match names against (e.g. "*.py")
+        sort_by: name, size, modified, created or type (directories first)
+        descending: Reverse the sort order
+        offset: Number of matching entries to skip
+        limit: Maximum entries to return (default: 500)
+        fields: Fields to include (default: all of name, path, is_file,
+            is_directory, size, modified, created, permissions)
+    """
     abs_path = directory if os.path.isabs(directory) else os.path.join(_base_dir, directory)
     
-    if not os.path.exists(abs_path):
-        return [{"error": f"Directory not found: {abs_path}"}]
+    if not os.path.isdir(abs_path):
+        return {"error": f"Directory not found: {abs_path}"}
+    if sort_by not in _LIST_SORT_KEYS:
+        return {"error": f"Invalid sort_by '{sort_by}'. Use one of: {', '.join(_LIST_SORT_KEYS)}"}
+    fields = list(fields or _LIST_FIELDS)
+    unknown = [field for field in fields if field not in _LIST_FIELDS]
+    if unknown:
+        return {"error": f"Unknown fields: {', '.join(unknown)}. Use any of: {', '.join(_LIST_FIELDS)}"}
+    if offset < 0 or limit < 1:
+        return {"error": "offset must be >= 0 and limit >= 1"}
     
-    files_info = []
     try:
-        for item in os.listdir(abs_path):
-            item_path = os.path.join(abs_path, item)
-            stat_info = os.stat(item_path)
-            
-            file_info = {
-                "name": item,
-                "path": item_path,
-                "is_file": os.path.isfile(item_path),
-                "is_directory": os.path.isdir(item_path),
-                "size": stat_info.st_size,
-                "modified": datetime.fromtimestamp(stat_info.st_mtime).isoformat(),
-                "created": datetime.fromtimestamp(stat_info.st_ctime).isoformat(),
-                "permissions": oct(stat_info.st_mode)[-3:]
-            }
-            files_info.append(file_info)
-        
-        return sorted(files_info, key=lambda x: x["name"])
+        listing = stat_cache.get_stat_cache().listdir(abs_path)
+        entries = [entry for entry in listing.entries
+                   if entry.stat is not None and (not pattern or fnmatch.fnmatch(entry.name, pattern))]
+        entries.sort(key=_LIST_SORT_KEYS[sort_by], reverse=descending)
+        
+        page = entries[offset:offset + limit]
+        result = {
+            "directory": abs_path,
+            "total": len(entries),
+            "offset": offset,
+            "returned": len(page),
+            "cache_age": stat_cache.cache_age(listing.cached_at),
+            "files": [{field: _entry_field(entry, field) for field in fields} for entry in page]
+        }
+        if offset + limit < len(entries):
+            result["next_offset"] = offset + limit
+        return result
     except Exception as e:
-        return [{"error": f"Error listing files: {str(e)}"}]
+        return {"error": f"Error listing files: {str(e)}"}
 
 
 @mcp.tool()
@@ -71,11 +128,13 @@ def delete_file(file_path: str) -> str:
         return f"Cannot delete directory with delete_file. Use remove_directory instead."
     
     try:
-        with _file_lock:
+        with _path_locks.write(abs_path):
             os.remove(abs_path)
         return f"File deleted successfully: {abs_path}"
     except Exception as e:
         return f"Error deleting file: {str(e)}"
+    finally:
+        stat_cache.note_change(abs_path)
 
 
 @mcp.tool()
@@ -88,12 +147,14 @@ def copy_file(source: str, destination: str) -> str:
         return f"Source file not found: {source_abs}"
     
     try:
-        with _file_lock:
+        with _path_locks.acquire(read=[source_abs], write=[dest_abs]):
             os.makedirs(os.path.dirname(dest_abs), exist_ok=True)
             shutil.copy2(source_abs, dest_abs)
         return f"File copied successfully: {source_abs} -> {dest_abs}"
     except Exception as e:
         return f"Error copying file: {str(e)}"
+    finally:
+        stat_cache.note_change(dest_abs)
 
 
 @mcp.tool()
@@ -106,12 +167,14 @@ def move_file(source: str, destination: str) -> str:
         return f"Source file not found: {source_abs}"
     
     try:
-        with _file_lock:
+        with _path_locks.acquire(write=[source_abs, dest_abs]):
             os.makedirs(os.path.dirname(dest_abs), exist_ok=True)
             shutil.move(source_abs, dest_abs)
         return f"File moved successfully: {source_abs} -> {dest_abs}"
     except Exception as e:
         return f"Error moving file: {str(e)}"
+    finally:
+        stat_cache.note_change(source_abs, dest_abs)
 
 
 @mcp.tool()
@@ -119,23 +182,25 @@ def get_file_info(file_path: str) -> Dict[str, Any]:
     """Get detailed file information."""
     abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
     
-    if not os.path.exists(abs_path):
-        return {"error": f"File not found: {abs_path}"}
-    
     try:
-        stat_info = os.stat(abs_path)
+        cached = stat_cache.get_stat_cache().lookup(abs_path)
+        if cached.stat is None:
+            return {"error": f"File not found: {abs_path}"}
+        stat_info = cached.stat
+        is_directory = stat.S_ISDIR(stat_info.st_mode)
         return {
             "name": os.path.basename(abs_path),
             "path": abs_path,
             "size": stat_info.st_size,
             "size_human": _format_bytes(stat_info.st_size),
-            "is_file": os.path.isfile(abs_path),
-            "is_directory": os.path.isdir(abs_path),
+            "is_file": stat.S_ISREG(stat_info.st_mode),
+            "is_directory": is_directory,
             "modified": datetime.fromtimestamp(stat_info.st_mtime).isoformat(),
             "created": datetime.fromtimestamp(stat_info.st_ctime).isoformat(),
             "accessed": datetime.fromtimestamp(stat_info.st_atime).isoformat(),
             "permissions": oct(stat_info.st_mode)[-3:],
-            "extension": os.path.splitext(abs_path)[1] if os.path.isfile(abs_path) else None
+            "extension": None if is_directory else os.path.splitext(abs_path)[1],
+            "cache_age": stat_cache.cache_age(cached.cached_at)
         }
     except Exception as e:
         return {"error": f"Error getting file info: {str(e)}"}
@@ -155,6 +220,8 @@ def create_directory(dir_path: str) -> str:
         return f"Directory created successfully: {abs_path}"
     except Exception as e:
         return f"Error creating directory: {str(e)}"
+    finally:
+        stat_cache.note_change(abs_path)
 
 
 @mcp.tool()
@@ -178,41 +245,100 @@ def remove_directory(dir_path: str, force: bool = False) -> str:
         if not force and "Directory not empty" in str(e):
             return f"Directory not empty. Use force=True to remove non-empty directory: {abs_path}"
         return f"Error removing directory: {str(e)}"
+    finally:
+        stat_cache.note_change(abs_path)
+
+
+def _scan_tree_dir(directory: str, rules: "ignore_rules.IgnoreRules") -> List[os.DirEntry]:
+    """Sorted, non-ignored entries of one directory for list_directory_tree."""
+    rules.load_directory(directory)
+    with os.scandir(directory) as it:
+        entries = [entry for entry in it
+                   if not rules.is_ignored(entry.path, entry.is_dir(follow_symlinks=False))]
+    entries.sort(key=lambda entry: entry.name)
+    return entries
 
 
 @mcp.tool()
-def list_directory_tree(path: str = ".", max_depth: int = 3) -> str:
-    """Show directory structure as a tree."""
+def list_directory_tree(path: str = ".", max_depth: int = 3, max_entries: int = 2000,
+                        max_per_directory: int = 200, ignore: Optional[List[str]] = None,
+                        use_gitignore: bool = True, output_format: str = "text") -> Any:
+    """
+    Show directory structure as a tree.
+    
+    Args:
+        path: Root directory
+        max_depth: Deepest level to descend into
+        max_entries: Stop after this many entries in total
+        max_per_directory: Show at most this many entries per directory
+        ignore: Extra .gitignore-style patterns to skip (e.g. ["node_modules/", "*.pyc"])
+        use_gitignore: Honour .gitignore files found in the tree (.git is always skipped)
+        output_format: "text" for a drawn tree, "json" for nested nodes
+    """
     abs_path = path if os.path.isabs(path) else os.path.join(_base_dir, path)
     
     if not os.path.exists(abs_path):
         return f"Path not found: {abs_path}"
+    if output_format not in ("text", "json"):
+        return "Error: output_format must be 'text' or 'json'"
     
-    def _build_tree(directory, prefix="", depth=0):
-        if depth > max_depth:
-            return ""
-        
-        tree_str = ""
+    rules = ignore_rules.IgnoreRules(abs_path, ignore, use_gitignore)
+    root_name = os.path.basename(os.path.normpath(abs_path)) or abs_path
+    lines = [root_name]
+    root_node = {"name": root_name, "type": "directory", "children": []}
+    shown = 0
+    truncated = False
+    
+    # Each frame: (entries, next index, text prefix, depth, JSON node)
+    stack = []
+    
+    def _push(directory, prefix, depth, node):
         try:
-            items = sorted(os.listdir(directory))
-            for i, item in enumerate(items):
-                item_path = os.path.join(directory, item)
-                is_last = i == len(items) - 1
-                
-                current_prefix = "└── " if is_last else "├── "
-                tree_str += f"{prefix}{current_prefix}{item}\n"
-                
-                if os.path.isdir(item_path) and depth < max_depth:
-                    extension = "    " if is_last else "│   "
-                    tree_str += _build_tree(item_path, prefix + extension, depth + 1)
-        except PermissionError:
-            tree_str += f"{prefix}[Permission Denied]\n"
-        
-        return tree_str
-    
-    tree = f"{os.path.basename(abs_path) or abs_path}\n"
-    tree += _build_tree(abs_path)
-    return tree
+            entries = _scan_tree_dir(directory, rules)
+        except OSError as e:
+            error = "Permission Denied" if isinstance(e, PermissionError) else str(e)
+            lines.append(f"{prefix}[{error}]")
+            node["error"] = error
+            return
+        hidden = len(entries) - max_per_directory
+        if hidden > 0:
+            entries = entries[:max_per_directory]
+            node["truncated"] = hidden
+        stack.append([entries, 0, prefix, depth, node, max(hidden, 0)])
+    
+    _push(abs_path, "", 0, root_node)
+    while stack:
+        frame = stack[-1]
+        entries, index, prefix, depth, node, hidden = frame
+        if index >= len(entries):
+            stack.pop()
+            if hidden:
+                lines.append(f"{prefix}└── ... ({hidden} more entries)")
+            continue
+        if shown >= max_entries:
+            truncated = True
+            break
+        
+        entry = entries[index]
+        frame[1] += 1
+        shown += 1
+        is_last = index == len(entries) - 1 and not hidden
+        lines.append(f"{prefix}{'└── ' if is_last else '├── '}{entry.name}")
+        
+        is_dir = entry.is_dir(follow_symlinks=False)
+        child = {"name": entry.name, "type": "directory" if is_dir else "file"}
+        node["children"].append(child)
+        if is_dir:
+            child["children"] = []
+            if depth < max_depth:
+                _push(entry.path, prefix + ("    " if is_last else "│   "), depth + 1, child)
+    
+    if truncated:
+        lines.append(f"[Truncated at {max_entries} entries. Raise max_entries or narrow the path to see more]")
+    
+    if output_format == "json":
+        return {"root": abs_path, "entries": shown, "truncated": truncated, "tree": root_node}
+    return "\n".join(lines) + "\n"
 
 
 # =============================================
@@ -346,8 +472,23 @@ def count_lines_of_code(file_path: str) -> Dict[str, int]:
 
 
 @mcp.tool()
-def find_in_files(search_term: str, directory: str = ".", file_extensions: List[str] = None) -> List[Dict[str, Any]]:
-    """Search for text across multiple files."""
+def find_in_files(search_term: str, directory: str = ".", file_extensions: List[str] = None,
+                  use_index: bool = True, regex: bool = False, case_sensitive: bool = False,
+                  max_results: int = 500, max_per_file: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Search for text across multiple files.
+    
+    Args:
+        search_term: Text (or regular expression, with regex=True) to find
+        directory: Directory to search under
+        file_extensions: Only search files with these extensions
+        use_index: Narrow the search with the persistent trigram index, so only
+            files containing every trigram of search_term are opened
+        regex: Treat search_term as a regular expression
+        case_sensitive: Match case exactly (default: case-insensitive)
+        max_results: Stop after this many matching lines in total
+        max_per_file: Report at most this many matching lines per file
+    """
     abs_path = directory if os.path.isabs(directory) else os.path.join(_base_dir, directory)
     
     if not os.path.exists(abs_path):
@@ -355,39 +496,30 @@ def find_in_files(search_term: str, directory: str = ".", file_extensions: List[
     
     if file_extensions is None:
         file_extensions = ['.py', '.txt', '.md', '.json', '.csv', '.js', '.html', '.css']
-    
-    results = []
+    extensions = tuple(file_extensions)
     
     try:
-        for root, dirs, files in os.walk(abs_path):
-            for file in files:
-                if any(file.endswith(ext) for ext in file_extensions):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()
-                        
-                        matches = []
-                        for line_num, line in enumerate(lines, 1):
-                            if search_term.lower() in line.lower():
-                                matches.append({
-                                    "line_number": line_num,
-                                    "line_content": line.strip(),
-                                    "match_position": line.lower().find(search_term.lower())
-                                })
-                        
-                        if matches:
-                            results.append({
-                                "file_path": file_path,
-                                "matches_count": len(matches),
-                                "matches": matches
-                            })
-                    
-                    except Exception:
-                        continue  # Skip files that can't be read
-        
+        if use_index:
+            index = trigram_index.get_index()
+            index.refresh(abs_path)
+            # A regex has no fixed substring to look up; the index still lists the text files
+            candidates, _total = index.candidates("" if regex else search_term, abs_path)
+        else:
+            candidates = sorted(os.path.join(root, file)
+                                for root, dirs, files in os.walk(abs_path) for file in files)
+        candidates = [path for path in candidates if path.endswith(extensions)]
+        
+        # Candidates are in path order, and so are the results
+        scan = file_search.SearchScan(candidates, search_term, regex=regex, case_sensitive=case_sensitive,
+                                      max_results=max_results, max_per_file=max_per_file)
+        results = list(scan)
+        if scan.truncated:
+            results.append({"truncated": True,
+                            "message": f"Stopped at max_results={max_results} matching lines"})
         return results
         
+    except re.error as e:
+        return [{"error": f"Invalid regular expression: {str(e)}"}]
     except Exception as e:
         return [{"error": f"Error searching files: {str(e)}"}]
 
@@ -396,40 +528,85 @@ def find_in_files(search_term: str, directory: str = ".", file_extensions: List[
 # DATA PROCESSING
 # =============================================
 
-import pdfplumber
+import pdf_tools
 
 @mcp.tool()
-def read_pdf(file_path: str,extract_metadata: bool = False) -> dict:
+def read_pdf(file_path: str, extract_metadata: bool = False, page_start: int = 1,
+             page_end: Optional[int] = None, max_chars: Optional[int] = None,
+             cursor: Optional[str] = None, backend: str = "layout",
+             stream: bool = False, memory_budget_mb: Optional[int] = None) -> str:
     """
     Read and return text from PDF file with optional metadata.
+    Page text is served from the shared on-disk cache when the file is unchanged.
+    Large documents can be paged through with page_start/page_end and max_chars;
+    a truncated response ends with a cursor to pass back for the next window.
     
     Args:
+        file_path: Path to the PDF file (relative or absolute)
         extract_metadata: Whether to include PDF metadata (default: False)
+        page_start: First page to return, 1-based (default: 1)
+        page_end: Last page to return (default: last page)
+        max_chars: Stop after this many characters of page text (default: no limit)
+        cursor: Continuation cursor from a previous truncated response
+        backend: "layout" (pdfplumber, default), "fast" (PyPDF2) or "auto" (fast, falling
+            back to layout for pages with empty or garbled output)
+        stream: Extract page by page with bounded memory and report peak memory use
+        memory_budget_mb: RSS limit for stream mode; extraction stops with a cursor when exceeded
     """
-   
-        
-    result = []
-    abs_path = os.path.join(_base_dir, file_path)    
-    with pdfplumber.open(abs_path) as pdf:
-        if extract_metadata and pdf.metadata:
-                result.append(f"PDF Metadata: {json.dumps(pdf.metadata, indent=2, default=str)}\n")
-            
-        result.append(f"Total pages: {len(pdf.pages)}\n")
-            
-        text_content = ""
-        for i, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text() or ""
-                if page_text.strip():
-                    text_content += f"\n--- Page {i} ---\n{page_text}\n"        
-        if text_content.strip():
-                result.append(text_content)
-        else:
-                result.append("No readable text found in PDF")
-        return "".join(result)
-    return f"Error reading PDF: {str(e)}"
+    abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
+    
+    if not os.path.exists(abs_path):
+        return f"File not found: {abs_path}"
+    
+    try:
+        return pdf_tools.read_pdf_text(
+            abs_path, extract_metadata, page_start=page_start, page_end=page_end, max_chars=max_chars,
+            cursor=cursor, backend=backend, stream=stream, memory_budget_mb=memory_budget_mb,
+        )
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
 
+@mcp.tool()
+def pdf_info(file_path: str) -> Dict[str, Any]:
+    """
+    Get page count and metadata of a PDF without extracting its text.
+    If file_path is a directory, every PDF in it is inventoried.
+    Results are cached per file and reused until the file changes.
+    """
+    abs_path = file_path if os.path.isabs(file_path) else os.path.join(_base_dir, file_path)
+    
+    if not os.path.exists(abs_path):
+        return {"error": f"File not found: {abs_path}"}
+    
+    try:
+        if os.path.isdir(abs_path):
+            files = pdf_tools.pdf_inventory(abs_path)
+            return {"directory": abs_path, "pdf_count": len(files), "files": files}
+        return pdf_tools.pdf_info(abs_path)
+    except Exception as e:
+        return {"error": f"Error reading PDF info: {str(e)}"}
 
 
+@mcp.tool()
+def search_pdfs(query: str, directory: str = ".", limit: int = 20) -> Dict[str, Any]:
+    """
+    Full-text search across every PDF under a directory.
+    Returns file, page and snippet for the best-ranked matching pages. Only PDFs
+    that changed since the last search are (re)indexed.
+    """
+    abs_path = directory if os.path.isabs(directory) else os.path.join(_base_dir, directory)
+    
+    if not os.path.isdir(abs_path):
+        return {"error": f"Directory not found: {abs_path}"}
+    
+    if not query.strip():
+        return {"error": "Search query cannot be empty"}
+    
+    try:
+        return pdf_tools.search_pdfs(query, abs_path, limit)
+    except Exception as e:
+        return {"error": f"Error searching PDFs: {str(e)}"}
 
 
 @mcp.tool()
@@ -495,7 +672,7 @@ def write_csv_file(file_path: str, data: List[Dict[str, Any]], delimiter: str =
     try:
         os.makedirs(os.path.dirname(abs_path), exist_ok=True)
         
-        with _file_lock:
+        with _path_locks.write(abs_path):
             with open(abs_path, 'w', newline='', encoding='utf-8') as f:
                 if isinstance(data[0], dict):
                     writer = csv.DictWriter(f, fieldnames=data[0].keys(), delimiter=delimiter)
@@ -509,6 +686,8 @@ def write_csv_file(file_path: str, data: List[Dict[str, Any]], delimiter: str =
         
     except Exception as e:
         return f"Error writing CSV: {str(e)}"
+    finally:
+        stat_cache.note_change(abs_path)
 
 
 @mcp.tool()
@@ -544,7 +723,7 @@ def write_json_file(file_path: str, data: Any, indent: int = 2) -> str:
     try:
         os.makedirs(os.path.dirname(abs_path), exist_ok=True)
         
-        with _file_lock:
+        with _path_locks.write(abs_path):
             with open(abs_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=indent, ensure_ascii=False, default=str)
         
@@ -552,6 +731,8 @@ def write_json_file(file_path: str, data: Any, indent: int = 2) -> str:
         
     except Exception as e:
         return f"Error writing JSON: {str(e)}"
+    finally:
+        stat_cache.note_change(abs_path)
 
 
 # =============================================
@@ -0,0 +1,464 @@
+"""
+Notes storage helpers for the MCP servers.
+Description: Notes.txt stays the append-only log of record; this module keeps a
+SQLite FTS5 sidecar index over it that is updated incrementally from the last
+indexed byte offset, reads recent notes from the end of the log without
+loading the rest, appends through a single group-commit writer, and keeps a
+rolling digest of the log for the analyze_notes prompt.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_TIMESTAMP = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]")
+
+
+def note_timestamp(line: str) -> Optional[str]:
+    """Return the "YYYY-MM-DD HH:MM:SS" prefix add_notes writes, or None."""
+    match = _TIMESTAMP.match(line)
+    return match.group(1) if match else None
+
+
+def iter_complete_lines(path: Path, offset: int, end: int,
+                        chunk_size: int = 1024 * 1024) -> Iterator[Tuple[str, int]]:
+    """
+    Yield (stripped line, offset just past it) for each complete line in
+    path[offset:end], reading in chunks. A partial trailing line (a write in
+    progress) is left for the next caller.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pending = b""
+        position = offset
+        while position < end:
+            chunk = f.read(min(chunk_size, end - position))
+            if not chunk:
+                break
+            position += len(chunk)
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            # Bytes of these lines (plus their newlines) end where the pending tail begins
+            line_end = position - len(pending) - sum(len(line) + 1 for line in lines)
+            for line in lines:
+                line_end += len(line) + 1
+                yield line.decode("utf-8", errors="replace").strip(), line_end
+
+
+# =============================================
+# TAIL READING
+# =============================================
+
+def tail_lines(path: Path, limit: int, block_size: int = 64 * 1024) -> List[str]:
+    """
+    Return the last `limit` non-empty lines of a file, stripped, oldest first.
+
+    Reads fixed-size blocks backwards from the end of the file and stops as soon
+    as enough lines have been seen, so cost is proportional to the output rather
+    than the file size.
+    """
+    found: List[bytes] = []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0 and len(found) < limit:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            parts = (f.read(size) + remainder).split(b"\n")
+            # The first part may continue in the previous block
+            remainder = parts[0]
+            for part in reversed(parts[1:]):
+                if part.strip():
+                    found.append(part)
+                    if len(found) == limit:
+                        break
+        if position == 0 and len(found) < limit and remainder.strip():
+            found.append(remainder)
+    return [line.decode("utf-8", errors="replace").strip() for line in reversed(found)]
+
+
+# =============================================
+# FULL-TEXT INDEX
+# =============================================
+
+class NotesIndex:
+    """
+    FTS5 index of the notes log.
+
+    The index remembers how many bytes of the log it has consumed, so sync()
+    only reads what was appended since the last call. If the log shrinks or is
+    replaced (different inode), the index is rebuilt from scratch.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, notes_file: Path, db_path: Path):
+        self.notes_file = Path(notes_file)
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                self._drop()
+                self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._create()
+
+    def _drop(self):
+        for table in ("notes_fts", "notes", "state"):
+            self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def _create(self):
+        # Separate statements: executescript() would commit the caller's transaction
+        self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY,
+            ts TEXT,
+            line TEXT NOT NULL
+        )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS notes_ts ON notes(ts)")
+        try:
+            # trigram keeps the old substring semantics of search_notes (SQLite >= 3.34)
+            self._conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                line, content = 'notes', content_rowid = 'id', tokenize = 'trigram')""")
+        except sqlite3.OperationalError:
+            self._conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                line, content = 'notes', content_rowid = 'id')""")
+
+    def _state(self, key: str) -> int:
+        row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def sync(self) -> int:
+        """
+        Index lines appended to the log since the last sync. Returns lines added.
+
+        Several server processes may share the index: the offset is read and
+        advanced inside one write transaction, so each line is indexed once.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # After taking the lock, so another process's progress is never mistaken for a shrink
+                stat = self.notes_file.stat()
+            except FileNotFoundError:
+                return 0
+            offset = self._state("offset")
+            if stat.st_ino != self._state("inode") or stat.st_size < offset:
+                self._drop()
+                self._create()
+                offset = 0
+            if stat.st_size == offset:
+                return 0
+
+            added, end = 0, offset
+            for line, end in iter_complete_lines(self.notes_file, offset, stat.st_size):
+                if not line:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT INTO notes (ts, line) VALUES (?, ?)", (note_timestamp(line), line)
+                )
+                self._conn.execute("INSERT INTO notes_fts (rowid, line) VALUES (?, ?)", (cursor.lastrowid, line))
+                added += 1
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                [("offset", end), ("inode", stat.st_ino)],
+            )
+            return added
+
+    def search(self, query: str, since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 50) -> Dict[str, Any]:
+        """
+        Return {"total", "matches"} for notes containing query, best-ranked first.
+        since/until are inclusive "YYYY-MM-DD" (or full timestamp) bounds.
+        """
+        filters, params = [], []
+        if since:
+            filters.append("n.ts >= ?")
+            params.append(since)
+        if until:
+            # Make a bare date cover the whole day
+            filters.append("n.ts <= ?")
+            params.append(until if len(until) > 10 else f"{until} 23:59:59")
+        where = "".join(f" AND {f}" for f in filters)
+
+        with self._lock:
+            if len(query) >= 3:
+                phrase = '"' + query.replace('"', '""') + '"'
+                base = f"FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid WHERE notes_fts MATCH ?{where}"
+                args = [phrase, *params]
+                total = self._conn.execute(f"SELECT COUNT(*) {base}", args).fetchone()[0]
+                rows = self._conn.execute(
+                    f"SELECT n.line {base} ORDER BY notes_fts.rank LIMIT ?", [*args, limit]
+                ).fetchall()
+            else:
+                # Too short for trigrams: plain substring scan, newest first
+                base = f"FROM notes n WHERE instr(lower(n.line), ?) > 0{where}"
+                args = [query.lower(), *params]
+                total = self._conn.execute(f"SELECT COUNT(*) {base}", args).fetchone()[0]
+                rows = self._conn.execute(
+                    f"SELECT n.line {base} ORDER BY n.id DESC LIMIT ?", [*args, limit]
+                ).fetchall()
+        return {"total": total, "matches": [row[0] for row in rows]}
+
+
+# =============================================
+# GROUP-COMMIT WRITER
+# =============================================
+
+class _Commit:
+    """Completion handle for one append() call."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class NotesWriter:
+    """
+    Single writer thread that appends notes to the log with group commit.
+
+    Concurrent append() calls are queued and written together in one write():
+    a batch is committed once max_batch_bytes are pending or flush_interval
+    seconds after its first note arrived. append() returns only after its batch
+    is written (and fsynced when fsync=True), so lines never interleave and a
+    returned call is as durable as configured. on_commit runs after each batch.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 0.005, max_batch_bytes: int = 1024 * 1024,
+                 fsync: bool = False, on_commit: Optional[Callable[[], None]] = None):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.max_batch_bytes = max_batch_bytes
+        self.fsync = fsync
+        self.on_commit = on_commit
+        self.batches = 0
+        self.notes = 0
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, int, _Commit]] = []
+        self._pending_bytes = 0
+        self._thread = threading.Thread(target=self._run, name="notes-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, lines: List[str]):
+        """Append lines (without trailing newlines) and wait until they are committed."""
+        if not lines:
+            return
+        text = "".join(f"{line}\n" for line in lines)
+        commit = _Commit()
+        with self._cond:
+            self._pending.append((text, len(lines), commit))
+            self._pending_bytes += len(text)
+            self._cond.notify()
+        commit.done.wait()
+        if commit.error is not None:
+            raise commit.error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while self._pending_bytes < self.max_batch_bytes:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending, self._pending_bytes = self._pending, [], 0
+
+            error = None
+            try:
+                self._write("".join(text for text, _count, _commit in batch))
+                self.batches += 1
+                self.notes += sum(count for _text, count, _commit in batch)
+            except Exception as e:
+                error = e
+            for _text, _count, commit in batch:
+                commit.error = error
+                commit.done.set()
+
+            if error is None and self.on_commit is not None:
+                try:
+                    self.on_commit()
+                except Exception as e:
+                    logger.warning(f"Notes post-commit hook failed: {e}")
+
+    def _write(self, data: str):
+        with open(self.path, "ab") as f:
+            if fcntl is not None:
+                # Keeps batches whole even when another server process appends too
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(data.encode("utf-8"))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+
+# =============================================
+# ROLLING DIGEST
+# =============================================
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9'-]{2,}")
+_STOPWORDS = frozenset("""
+    the and for with that this from have has was were are but not you your our
+    all any can had her his its one out she they them then than too use who will
+    would about into over just also been more some what when which there their
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class NotesDigest:
+    """
+    Per-day and per-week summaries of the notes log, updated incrementally.
+
+    Like NotesIndex, sync() only reads bytes appended since the last call.
+    Term counters are compacted to their most common entries so memory stays
+    bounded however large the log grows.
+    """
+
+    MAX_TERMS = 500
+
+    def __init__(self, notes_file: Path, recent_size: int = 200):
+        self.notes_file = Path(notes_file)
+        self.total = 0
+        self.undated = 0
+        self.days: Counter = Counter()
+        self.weeks: Dict[str, Dict[str, Any]] = {}
+        self.terms: Counter = Counter()
+        self.recent: deque = deque(maxlen=recent_size)
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.total = self.undated = 0
+        self.days.clear()
+        self.weeks.clear()
+        self.terms.clear()
+        self.recent.clear()
+        self._offset = 0
+
+    def sync(self) -> int:
+        """Fold lines appended since the last sync into the digest. Returns lines added."""
+        try:
+            stat = self.notes_file.stat()
+        except FileNotFoundError:
+            return 0
+
+        with self._lock:
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._reset()
+                self._inode = stat.st_ino
+            added = 0
+            for line, self._offset in iter_complete_lines(self.notes_file, self._offset, stat.st_size):
+                if line:
+                    self._add(line)
+                    added += 1
+            return added
+
+    def _add(self, line: str):
+        self.total += 1
+        self.recent.append(line)
+        ts = note_timestamp(line)
+        body = line[len(ts) + 2:] if ts else line
+        words = [w for w in (m.group(0).lower() for m in _WORD.finditer(body)) if w not in _STOPWORDS]
+        self.terms.update(words)
+        if len(self.terms) > self.MAX_TERMS * 4:
+            self.terms = Counter(dict(self.terms.most_common(self.MAX_TERMS)))
+
+        if not ts:
+            self.undated += 1
+            return
+        day = ts[:10]
+        self.days[day] += 1
+        year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+        summary = self.weeks.setdefault(f"{year}-W{week:02d}", {"count": 0, "terms": Counter()})
+        summary["count"] += 1
+        summary["terms"].update(words)
+        if len(summary["terms"]) > self.MAX_TERMS:
+            summary["terms"] = Counter(dict(summary["terms"].most_common(self.MAX_TERMS // 4)))
+
+    def build_prompt(self, token_budget: int) -> str:
+        """
+        Build the analyze_notes prompt from the digests plus the most recent
+        notes, staying within roughly token_budget tokens.
+        """
+        with self._lock:
+            header = f"Please analyze the following collection of {self.total} notes.\n"
+            footer = """
+Please provide:
+1. Common themes and patterns
+2. Chronological trends (if timestamps are present)
+3. Key insights and observations
+4. Suggestions for organization or follow-up actions
+"""
+            top_terms = ", ".join(f"{term} ({count})" for term, count in self.terms.most_common(25))
+            overview = [
+                "\nOverview:",
+                f"- Dated notes: {self.total - self.undated}, undated: {self.undated}",
+                f"- Active days: {len(self.days)}" + (f" ({min(self.days)} to {max(self.days)})" if self.days else ""),
+                f"- Most frequent terms: {top_terms or 'n/a'}",
+            ]
+            weekly = [
+                f"- {week}: {summary['count']} notes; top terms: "
+                + ", ".join(term for term, _ in summary["terms"].most_common(8))
+                for week, summary in sorted(self.weeks.items(), reverse=True)
+            ]
+            recent = list(self.recent)
+
+        used = estimate_tokens(header) + estimate_tokens(footer)
+        sections = [header]
+        for line in overview:
+            used += estimate_tokens(line)
+            sections.append(line)
+
+        # Weekly digest gets up to half of what is left; recent notes get the rest
+        weekly_budget = used + (token_budget - used) // 2
+        if weekly:
+            sections.append("\nWeekly activity (newest first):")
+            shown = 0
+            for line in weekly:
+                cost = estimate_tokens(line)
+                if used + cost > weekly_budget:
+                    break
+                sections.append(line)
+                used += cost
+                shown += 1
+            if shown < len(weekly):
+                sections.append(f"- ... {len(weekly) - shown} earlier weeks omitted")
+
+        window = []
+        for line in reversed(recent):
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                break
+            window.append(line)
+            used += cost
+        if window:
+            sections.append(f"\nMost recent {len(window)} notes (oldest first):")
+            sections.extend(reversed(window))
+
+        sections.append(footer)
+        return "\n".join(sections)
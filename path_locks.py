@@ -0,0 +1,114 @@
+"""
+Per-path locking for the MCP file tools.
+Description: Reader/writer locks keyed by normalised path, so reads of a file
+share access, writes are exclusive, and operations on unrelated files do not
+wait for each other. Paths hash onto a fixed set of lock stripes, which keeps
+memory constant however many files are touched.
+"""
+
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator
+
+
+def normalise_path(path: str) -> str:
+    """Canonical form of path, so different spellings of one file share a lock."""
+    return os.path.normcase(os.path.realpath(os.path.abspath(path)))
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Waiting writers block new readers, so a steady
+    stream of reads cannot starve a write.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class PathLocks:
+    """
+    Striped reader/writer locks keyed by path.
+
+    Two paths that hash to the same stripe share a lock, which only costs
+    some concurrency; more stripes means fewer such collisions. Operations
+    that need several paths take their stripes in index order, so they
+    cannot deadlock against each other.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._stripes = [ReadWriteLock() for _ in range(stripes)]
+
+    def _stripe(self, path: str) -> int:
+        return zlib.crc32(normalise_path(path).encode("utf-8", "surrogateescape")) % len(self._stripes)
+
+    @contextmanager
+    def read(self, path: str) -> Iterator[None]:
+        """Shared access to path."""
+        with self.acquire(read=[path]):
+            yield
+
+    @contextmanager
+    def write(self, path: str) -> Iterator[None]:
+        """Exclusive access to path."""
+        with self.acquire(write=[path]):
+            yield
+
+    @contextmanager
+    def acquire(self, read: Iterable[str] = (), write: Iterable[str] = ()) -> Iterator[None]:
+        """
+        Shared access to every path in read and exclusive access to every path
+        in write, all at once. A path in both gets exclusive access.
+        """
+        modes: Dict[int, bool] = {}  # stripe -> exclusive
+        for path in read:
+            modes.setdefault(self._stripe(path), False)
+        for path in write:
+            modes[self._stripe(path)] = True
+
+        held = []
+        try:
+            for index in sorted(modes):
+                lock = self._stripes[index]
+                if modes[index]:
+                    lock.acquire_write()
+                    held.append(lock.release_write)
+                else:
+                    lock.acquire_read()
+                    held.append(lock.release_read)
+            yield
+        finally:
+            for release in reversed(held):
+                release()
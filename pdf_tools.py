@@ -0,0 +1,881 @@
+"""
+Shared PDF helpers for the MCP servers.
+Description: Page-level text extraction for read_pdf, backed by a persistent
+on-disk cache so repeat reads of the same document skip parsing entirely,
+with large documents split across a process pool. Text comes from pdfplumber
+("layout"), PyPDF2 ("fast") or PyPDF2 with a pdfplumber fallback ("auto").
+A streaming mode extracts one page at a time under a memory budget, and an
+FTS5 index over page text backs search_pdfs. CacheWarmer pre-extracts a
+watched folder in the background.
+"""
+
+import gc
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pdfplumber
+from PyPDF2 import PdfReader
+
+from cache_paths import CACHE_DIR
+import worker_pool
+from file_watch import DirectoryWatcher
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+PDF_CACHE_FILE = CACHE_DIR / "pdf_pages.db"
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 256MB of text
+# Processes extract_pages uses; left at MCP_POOL_WORKERS it shares the server's one pool
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", worker_pool.POOL_WORKERS))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 32))
+PDF_PAGE_BATCH = 16  # pages parsed at a time while filling a max_chars budget
+BACKENDS = ("fast", "layout", "auto")
+PDF_MEMORY_BUDGET_MB = int(os.environ.get("PDF_MEMORY_BUDGET_MB", 0)) or None  # stream mode RSS limit
+
+logger = logging.getLogger(__name__)
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Return the hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# =============================================
+# PAGE TEXT CACHE
+# =============================================
+
+class PageTextCache:
+    """
+    SQLite-backed cache of extracted page text.
+
+    Files are identified by (path, size, mtime); the content hash recorded for
+    them is the real cache key, so a touched-but-unchanged or copied file still
+    hits. Documents are evicted least-recently-used once the stored text
+    exceeds max_bytes. A separate info table holds pdf_info results keyed by
+    (path, size, mtime) alone, so inventories never hash file contents.
+    """
+
+    SCHEMA_VERSION = 3
+
+    def __init__(self, db_path: Path = PDF_CACHE_FILE, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                # It is only a cache: drop anything written by another layout.
+                for table in ("files", "documents", "pages", "info"):
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    hash TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS documents (
+                    hash TEXT PRIMARY KEY,
+                    page_count INTEGER NOT NULL,
+                    metadata TEXT,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    last_access REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    hash TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    page_no INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (hash, backend, page_no)
+                );
+                CREATE TABLE IF NOT EXISTS info (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    info TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS documents_last_access ON documents(last_access);
+            """)
+
+    def content_hash(self, path: Path) -> str:
+        """Return the content hash of path, re-hashing only if size or mtime changed."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0]
+
+        digest = file_sha256(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, digest),
+            )
+        return digest
+
+    def get_info(self, path: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Return the cached pdf_info result for path if the file is unchanged."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info FROM info WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_info(self, path: Path, stat: os.stat_result, info: Dict[str, Any]):
+        """Store a pdf_info result for path."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO info (path, size, mtime_ns, info) VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, json.dumps(info, default=str)),
+            )
+
+    def get_document(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Return {"page_count", "metadata"} for a cached document, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_count, metadata FROM documents WHERE hash = ?", (digest,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"page_count": row[0], "metadata": json.loads(row[1]) if row[1] else {}}
+
+    def put_document(self, digest: str, page_count: int, metadata: Optional[Dict[str, Any]]):
+        """Record page count and metadata for a document."""
+        metadata_json = json.dumps(metadata or {}, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO documents (hash, page_count, metadata, last_access) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(hash) DO UPDATE SET page_count = excluded.page_count,
+                   metadata = excluded.metadata, last_access = excluded.last_access""",
+                (digest, page_count, metadata_json, time.time()),
+            )
+
+    def get_pages(self, digest: str, page_numbers: Iterable[int], backend: str = "layout") -> Dict[int, str]:
+        """Return the cached text of the requested (1-based) pages that are present."""
+        wanted = list(page_numbers)
+        found: Dict[int, str] = {}
+        with self._lock, self._conn:
+            # Chunked to stay under SQLite's bound-parameter limit.
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT page_no, text FROM pages WHERE hash = ? AND backend = ? AND page_no IN ({placeholders})",
+                    [digest, backend, *chunk],
+                ).fetchall()
+                found.update(rows)
+            self._conn.execute("UPDATE documents SET last_access = ? WHERE hash = ?", (time.time(), digest))
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def put_pages(self, digest: str, pages: Dict[int, str], backend: str = "layout"):
+        """Store extracted page text and evict old documents if over budget."""
+        if not pages:
+            return
+        added = sum(len(text.encode("utf-8")) for text in pages.values())
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (hash, backend, page_no, text) VALUES (?, ?, ?, ?)",
+                [(digest, backend, page_no, text) for page_no, text in pages.items()],
+            )
+            self._conn.execute(
+                "UPDATE documents SET bytes = bytes + ?, last_access = ? WHERE hash = ?",
+                (added, time.time(), digest),
+            )
+            self._evict(keep=digest)
+
+    def _evict(self, keep: str):
+        """Drop least-recently-used documents until the cache fits max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT hash, bytes FROM documents WHERE hash != ? ORDER BY last_access", (keep,)
+        ).fetchall()
+        for digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE hash = ?", (digest,))
+            self._conn.execute("DELETE FROM documents WHERE hash = ?", (digest,))
+            self._conn.execute("DELETE FROM files WHERE hash = ?", (digest,))
+            total -= size
+
+    def record_misses(self, count: int):
+        """Count pages that had to be extracted without a cached document entry."""
+        with self._lock:
+            self.misses += count
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock:
+            documents, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM documents"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "documents": documents,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_default_cache: Optional[PageTextCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache() -> PageTextCache:
+    """Return the process-wide page text cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PageTextCache()
+        return _default_cache
+
+
+# =============================================
+# METADATA-ONLY FAST PATH
+# =============================================
+
+def pdf_info(path: Path, cache: Optional[PageTextCache] = None) -> Dict[str, Any]:
+    """
+    Return page count and document info for a PDF without extracting any text.
+
+    PyPDF2 only reads the trailer, the info dictionary and the page tree; no
+    page content stream is decoded. Results are cached per (path, size, mtime).
+    """
+    cache = cache or get_cache()
+    path = Path(path).resolve()
+    stat = path.stat()
+    info = cache.get_info(path, stat)
+    if info is not None:
+        return {**info, "cached": True}
+
+    reader = PdfReader(str(path))
+    encrypted = reader.is_encrypted
+    if encrypted:
+        reader.decrypt("")  # many "encrypted" PDFs only carry an owner password
+    metadata = {key.lstrip("/"): str(value) for key, value in (reader.metadata or {}).items()}
+    info = {
+        "path": str(path),
+        "file_size": stat.st_size,
+        "pdf_version": reader.pdf_header.replace("%PDF-", ""),
+        "encrypted": encrypted,
+        "pages": len(reader.pages),
+        "metadata": metadata,
+    }
+    cache.put_info(path, stat, info)
+    return {**info, "cached": False}
+
+
+def pdf_inventory(directory: Path, cache: Optional[PageTextCache] = None) -> List[Dict[str, Any]]:
+    """Return pdf_info for every PDF directly inside directory, sorted by name."""
+    results = []
+    for entry in sorted(Path(directory).iterdir()):
+        if entry.suffix.lower() != ".pdf" or not entry.is_file():
+            continue
+        try:
+            results.append(pdf_info(entry, cache))
+        except Exception as e:
+            results.append({"path": str(entry), "error": str(e)})
+    return results
+
+
+# =============================================
+# EXTRACTION
+# =============================================
+
+def _extract_from_pdf(pdf, page_numbers: Iterable[int]) -> Dict[int, str]:
+    """Extract text for the given (1-based) pages from an open pdfplumber document."""
+    return {page_no: pdf.pages[page_no - 1].extract_text() or "" for page_no in page_numbers}
+
+
+def _extract_from_reader(reader: PdfReader, page_numbers: Iterable[int]) -> Dict[int, str]:
+    """Extract text for the given (1-based) pages from an open PyPDF2 reader."""
+    return {page_no: reader.pages[page_no - 1].extract_text() or "" for page_no in page_numbers}
+
+
+def _looks_garbled(text: str) -> bool:
+    """Heuristic used by the auto backend to decide when PyPDF2 output needs a layout retry."""
+    stripped = text.strip()
+    if not stripped:
+        return True
+    if "(cid:" in stripped:
+        return True
+    bad = sum(1 for c in stripped if c == "\ufffd" or not (c.isprintable() or c.isspace()))
+    if bad > len(stripped) * 0.05:
+        return True
+    # PyPDF2 sometimes drops inter-word spacing, producing run-on text.
+    spaces = sum(1 for c in stripped if c.isspace())
+    return len(stripped) > 200 and spaces < len(stripped) / 25
+
+
+def _extract_page_range(path: str, page_numbers: List[int], backend: str = "layout") -> Dict[int, str]:
+    """Process-pool worker: open a private handle and extract some pages with a backend."""
+    if backend == "layout":
+        with pdfplumber.open(path) as pdf:
+            return _extract_from_pdf(pdf, page_numbers)
+
+    pages = _extract_from_reader(PdfReader(path), page_numbers)
+    if backend == "auto":
+        retry = [page_no for page_no, text in pages.items() if _looks_garbled(text)]
+        if retry:
+            with pdfplumber.open(path) as pdf:
+                pages.update(_extract_from_pdf(pdf, retry))
+    return pages
+
+
+def _split_pages(page_numbers: List[int], parts: int) -> List[List[int]]:
+    """Split sorted page numbers into at most `parts` contiguous, similarly sized chunks."""
+    size = max(1, -(-len(page_numbers) // parts))
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Use one of: {', '.join(BACKENDS)}")
+
+
+def extract_pages(path: Path, page_numbers: Iterable[int], workers: Optional[int] = None,
+                  backend: str = "layout") -> Dict[int, str]:
+    """
+    Extract text for the given (1-based) pages, bypassing the cache.
+
+    backend is "layout" (pdfplumber), "fast" (PyPDF2) or "auto" (PyPDF2, with
+    pdfplumber re-extracting pages whose fast output is empty or garbled).
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages to extract are split
+    into contiguous page ranges across a process pool; smaller jobs run serially.
+
+    workers (default PDF_WORKERS) is the number of pool processes: the pages
+    are split into workers * 2 chunks and run on worker_pool.get_pool(workers).
+    workers <= 1 extracts in this process.
+    """
+    _check_backend(backend)
+    workers = PDF_WORKERS if workers is None else workers
+    page_numbers = sorted(page_numbers)
+    if workers <= 1 or len(page_numbers) < PDF_PARALLEL_MIN_PAGES:
+        return _extract_page_range(str(path), page_numbers, backend)
+
+    # Two chunks per worker keeps the pool busy when some pages are much slower.
+    chunks = _split_pages(page_numbers, workers * 2)
+    results: Dict[int, str] = {}
+    for part in worker_pool.get_pool(workers).map(_extract_page_range, repeat(str(path)), chunks, repeat(backend)):
+        results.update(part)
+    return results
+
+
+def _read_document(path: Path, backend: str) -> Tuple[int, Dict[str, Any]]:
+    """Return (page_count, metadata) using the parser that matches the backend."""
+    if backend == "layout":
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages), pdf.metadata or {}
+    info = pdf_info(path)
+    return info["pages"], info["metadata"]
+
+
+# =============================================
+# BOUNDED-MEMORY STREAMING
+# =============================================
+
+def current_rss() -> int:
+    """Return the resident set size of this process in bytes (peak RSS where unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class MemoryTracker:
+    """Samples RSS between pages of a streaming extraction and enforces a budget."""
+
+    def __init__(self, budget_mb: Optional[int] = None):
+        self.budget = budget_mb * 1024 * 1024 if budget_mb else None
+        self.peak = current_rss()
+        self.exceeded = False
+
+    def sample(self) -> bool:
+        """Record current RSS; return False once the budget is exceeded."""
+        rss = current_rss()
+        if self.budget and rss > self.budget:
+            gc.collect()
+            rss = current_rss()
+        self.peak = max(self.peak, rss)
+        if self.budget and rss > self.budget:
+            self.exceeded = True
+        return not self.exceeded
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak / (1024 * 1024)
+
+
+def _release_page(page):
+    """Drop a pdfplumber page's parsed char/object caches."""
+    release = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+    if release:
+        release()
+
+
+def extract_pages_streaming(path: Path, page_numbers: Iterable[int], backend: str,
+                            tracker: MemoryTracker) -> Dict[int, str]:
+    """
+    Extract pages one at a time in this process, releasing each page after use.
+
+    Stops early (returning the pages extracted so far) once tracker reports the
+    memory budget has been exceeded.
+    """
+    _check_backend(backend)
+    results: Dict[int, str] = {}
+    with ExitStack() as stack:
+        reader = PdfReader(str(path)) if backend != "layout" else None
+        plumber = None
+        for page_no in sorted(page_numbers):
+            text = None
+            if reader is not None:
+                text = reader.pages[page_no - 1].extract_text() or ""
+            if backend == "layout" or (backend == "auto" and _looks_garbled(text)):
+                if plumber is None:
+                    plumber = stack.enter_context(pdfplumber.open(path))
+                page = plumber.pages[page_no - 1]
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    _release_page(page)
+            results[page_no] = text
+            if not tracker.sample():
+                break
+    return results
+
+
+def load_pages(path: Path, first: int = 1, last: Optional[int] = None,
+               cache: Optional[PageTextCache] = None, workers: Optional[int] = None,
+               backend: str = "layout",
+               tracker: Optional[MemoryTracker] = None) -> Tuple[Dict[str, Any], int, List[str]]:
+    """
+    Return (metadata, page_count, page_texts) for pages first..last of a PDF.
+
+    Only pages in the window that are missing from the cache for this backend
+    are parsed; last defaults to (and is clamped at) the final page. With a
+    tracker, pages are streamed under its memory budget and page_texts may stop
+    short of last if the budget runs out.
+    """
+    _check_backend(backend)
+    cache = cache or get_cache()
+    digest = cache.content_hash(path)
+
+    document = cache.get_document(digest)
+    cached: Dict[int, str] = {}
+    if document is not None:
+        page_count, metadata = document["page_count"], document["metadata"]
+        last = page_count if last is None else min(last, page_count)
+        cached = cache.get_pages(digest, range(first, last + 1), backend)
+        if len(cached) == max(0, last - first + 1):
+            return metadata, page_count, [cached[i] for i in range(first, last + 1)]
+    else:
+        page_count, metadata = _read_document(path, backend)
+        last = page_count if last is None else min(last, page_count)
+
+    missing = [i for i in range(first, last + 1) if i not in cached]
+    if tracker is not None:
+        fresh = extract_pages_streaming(path, missing, backend, tracker)
+    else:
+        fresh = extract_pages(path, missing, workers, backend)
+
+    if document is None:
+        cache.record_misses(len(fresh))
+        cache.put_document(digest, page_count, metadata)
+    cache.put_pages(digest, fresh, backend)
+    cached.update(fresh)
+
+    texts = []
+    for i in range(first, last + 1):
+        if i not in cached:
+            break
+        texts.append(cached[i])
+    return metadata, page_count, texts
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    """Parse a read_pdf continuation cursor of the form "PAGE:OFFSET"."""
+    try:
+        page, offset = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}', expected 'PAGE:OFFSET'")
+    if page < 1 or offset < 0:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return page, offset
+
+
+def read_pdf_text(path: Path, extract_metadata: bool = False, page_start: int = 1,
+                  page_end: Optional[int] = None, max_chars: Optional[int] = None,
+                  cursor: Optional[str] = None, backend: str = "layout", stream: bool = False,
+                  memory_budget_mb: Optional[int] = None) -> str:
+    """
+    Build the read_pdf response text for a window of a PDF.
+
+    Pages page_start..page_end are returned, stopping once max_chars characters
+    of page text have been emitted. When output is cut short the response ends
+    with a cursor; passing it back (with the same backend) resumes exactly
+    where this call stopped. backend selects the extractor, see extract_pages.
+
+    stream extracts page by page in-process, releasing each page's caches, and
+    stops with a cursor once RSS passes memory_budget_mb (default
+    PDF_MEMORY_BUDGET_MB). Streaming responses report the peak RSS of the call.
+    """
+    if page_start < 1 or (page_end is not None and page_end < page_start):
+        raise ValueError("Invalid page range")
+    if max_chars is not None and max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    _check_backend(backend)
+
+    page_no, offset = parse_cursor(cursor) if cursor else (page_start, 0)
+    # With a character budget the stopping page is unknown, so parse in batches.
+    batch = PDF_PAGE_BATCH if max_chars else None
+    remaining = max_chars
+    tracker = MemoryTracker(memory_budget_mb or PDF_MEMORY_BUDGET_MB) if stream else None
+
+    result: List[str] = []
+    text_parts: List[str] = []
+    next_cursor = None
+    page_count = None
+    last: Optional[int] = None  # last page to return, known once the first batch is loaded
+    while last is None or (page_no <= last and next_cursor is None):
+        batch_last = page_end if batch is None else page_no + batch - 1
+        if page_end is not None:
+            batch_last = min(batch_last, page_end)
+        metadata, page_count, texts = load_pages(path, page_no, batch_last, backend=backend, tracker=tracker)
+
+        if last is None:
+            last = page_count if page_end is None else min(page_end, page_count)
+            if extract_metadata and metadata:
+                result.append(f"PDF Metadata: {json.dumps(metadata, indent=2, default=str)}\n")
+            result.append(f"Total pages: {page_count}\n")
+            if page_no > 1 or last < page_count:
+                result.append(f"Showing pages {page_no}-{last}\n")
+
+        for page_text in texts:
+            if offset:
+                page_text = page_text[offset:]
+            if remaining is not None and remaining <= 0 and page_text.strip():
+                next_cursor = f"{page_no}:{offset}"
+                break
+            if remaining is not None and len(page_text) > remaining:
+                page_text = page_text[:remaining]
+                next_cursor = f"{page_no}:{offset + remaining}"
+            if page_text.strip():
+                label = f"Page {page_no} (continued)" if offset else f"Page {page_no}"
+                text_parts.append(f"\n--- {label} ---\n{page_text}\n")
+                if remaining is not None:
+                    remaining -= len(page_text)
+            if next_cursor:
+                break
+            page_no, offset = page_no + 1, 0
+
+        if tracker is not None and tracker.exceeded and next_cursor is None and page_no <= last:
+            next_cursor = f"{page_no}:{offset}"
+
+    if text_parts:
+        result.extend(text_parts)
+    else:
+        result.append("No readable text found in PDF")
+    if next_cursor:
+        reason = (f"Stopped at the {memory_budget_mb or PDF_MEMORY_BUDGET_MB} MB memory budget"
+                  if tracker is not None and tracker.exceeded
+                  else f"Output truncated at {max_chars} characters")
+        result.append(f"\n[{reason}. Call read_pdf again with cursor=\"{next_cursor}\" to continue]\n")
+    if tracker is not None:
+        result.append(f"\n[Peak memory: {tracker.peak_mb:.1f} MB]\n")
+
+    return "".join(result)
+
+
+# =============================================
+# FULL-TEXT SEARCH
+# =============================================
+
+PDF_SEARCH_FILE = CACHE_DIR / "pdf_search.db"
+
+
+def _fts_query(query: str) -> str:
+    """Quote each term so user input is matched literally (all terms required)."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class PdfSearchIndex:
+    """
+    SQLite FTS5 inverted index of PDF page text.
+
+    refresh() re-indexes only files whose size/mtime changed and whose content
+    hash differs from the indexed one; page text comes from the page cache, so
+    files already read with read_pdf are indexed without re-parsing.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: Path = PDF_SEARCH_FILE, backend: str = "layout"):
+        self.db_path = Path(db_path)
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS indexed_files")
+                self._conn.execute("DROP TABLE IF EXISTS page_text")
+                self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS indexed_files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    hash TEXT NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+                    path UNINDEXED, page UNINDEXED, text, tokenize = 'unicode61'
+                );
+            """)
+
+    def refresh(self, directory: Path, failures: Optional[List[Dict[str, str]]] = None) -> Dict[str, int]:
+        """
+        Bring the index for every PDF under directory up to date.
+
+        A PDF that can no longer be read or parsed loses its indexed pages, so
+        searches don't return text it no longer has; it is counted as "failed",
+        logged, and appended to failures as {"file", "error"}.
+        """
+        prefix = f"{Path(directory).resolve()}{os.sep}"
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0}
+        with self._lock:
+            known = {
+                path: (size, mtime_ns, digest)
+                for path, size, mtime_ns, digest in self._conn.execute(
+                    "SELECT path, size, mtime_ns, hash FROM indexed_files WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            }
+
+        seen = set()
+        for root, _dirs, files in os.walk(prefix):
+            for name in files:
+                if not name.lower().endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                seen.add(path)
+                try:
+                    self._refresh_file(path, known.get(path), counts)
+                except Exception as e:
+                    logger.warning(f"Could not index {path}: {e}")
+                    self._forget(path)
+                    counts["failed"] += 1
+                    if failures is not None:
+                        failures.append({"file": path, "error": str(e)})
+
+        removed = [path for path in known if path not in seen]
+        for path in removed:
+            self._forget(path)
+        counts["removed"] = len(removed)
+        return counts
+
+    def _forget(self, path: str):
+        """Drop a file's pages and stored stat from the index."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM page_text WHERE path = ?", (path,))
+            self._conn.execute("DELETE FROM indexed_files WHERE path = ?", (path,))
+
+    def _refresh_file(self, path: str, known: Optional[Tuple[int, int, str]], counts: Dict[str, int]):
+        stat = os.stat(path)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            counts["unchanged"] += 1
+            return
+
+        digest = get_cache().content_hash(path)
+        if known and known[2] == digest:
+            # Touched but not modified: just remember the new stat.
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE indexed_files SET size = ?, mtime_ns = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime_ns, path),
+                )
+            counts["unchanged"] += 1
+            return
+
+        _metadata, _page_count, texts = load_pages(path, backend=self.backend)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM page_text WHERE path = ?", (path,))
+            self._conn.executemany(
+                "INSERT INTO page_text (path, page, text) VALUES (?, ?, ?)",
+                [(path, page_no, text) for page_no, text in enumerate(texts, 1) if text.strip()],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO indexed_files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+        counts["updated" if known else "added"] += 1
+
+    def search(self, query: str, directory: Path, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return best-ranked (file, page, snippet) hits under directory."""
+        prefix = f"{Path(directory).resolve()}{os.sep}"
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT path, page, snippet(page_text, 2, '[', ']', '...', 16)
+                   FROM page_text WHERE page_text MATCH ? AND substr(path, 1, ?) = ?
+                   ORDER BY rank LIMIT ?""",
+                (_fts_query(query), len(prefix), prefix, limit),
+            ).fetchall()
+        return [
+            {"file": path, "page": page, "snippet": snippet.replace("\n", " ")}
+            for path, page, snippet in rows
+        ]
+
+
+_search_index: Optional[PdfSearchIndex] = None
+
+
+def search_pdfs(query: str, directory: Path, limit: int = 20) -> Dict[str, Any]:
+    """
+    Refresh the search index for directory, then run query against it. PDFs
+    that could not be indexed are listed under "failed".
+    """
+    global _search_index
+    with _default_cache_lock:
+        if _search_index is None:
+            _search_index = PdfSearchIndex()
+    start = time.perf_counter()
+    failures: List[Dict[str, str]] = []
+    indexed = _search_index.refresh(directory, failures)
+    refreshed = time.perf_counter()
+    results = _search_index.search(query, directory, limit)
+    return {
+        "query": query,
+        "directory": str(Path(directory).resolve()),
+        "indexed": indexed,
+        "failed": failures,
+        "results": results,
+        "index_ms": round((refreshed - start) * 1000, 2),
+        "search_ms": round((time.perf_counter() - refreshed) * 1000, 2),
+    }
+
+
+# =============================================
+# BACKGROUND CACHE WARM-UP
+# =============================================
+
+class CacheWarmer:
+    """
+    Background worker that keeps the page cache warm for every PDF in a folder.
+
+    All PDFs are queued at start-up and re-queued whenever the watcher reports
+    a change. Tool calls never wait for it: load_pages reads whatever is already
+    cached and extracts the rest on demand.
+    """
+
+    def __init__(self, directory: Path, backend: str = "layout", poll_interval: float = 5.0):
+        _check_backend(backend)
+        self.directory = Path(directory).resolve()
+        self.backend = backend
+        self.warmed = 0
+        self.failed = 0
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._pending = set()
+        self._active: Optional[str] = None
+        self._pending_lock = threading.Lock()
+        self._watcher = DirectoryWatcher(str(self.directory), self._on_change, poll_interval=poll_interval)
+        self._thread = threading.Thread(target=self._run, name="pdf-cache-warmer", daemon=True)
+
+    def start(self) -> "CacheWarmer":
+        self._thread.start()
+        self._watcher.start()
+        self._enqueue_tree(self.directory)
+        return self
+
+    def stop(self):
+        self._watcher.stop()
+
+    def status(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending) + (self._active is not None)
+        return {
+            "directory": str(self.directory),
+            "watch_mode": self._watcher.mode,
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "pending": pending,
+            "ready": pending == 0,
+        }
+
+    def _enqueue(self, path: str):
+        with self._pending_lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+        self._queue.put(path)
+
+    def _enqueue_tree(self, directory: Path):
+        for root, _dirs, files in os.walk(directory):
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    self._enqueue(os.path.join(root, name))
+
+    def _on_change(self, path: str):
+        if os.path.isdir(path):
+            self._enqueue_tree(Path(path))
+        elif path.lower().endswith(".pdf") and os.path.exists(path):
+            self._enqueue(path)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            with self._pending_lock:
+                self._pending.discard(path)
+                self._active = path
+            try:
+                if os.path.exists(path):
+                    load_pages(path, backend=self.backend)
+                    self.warmed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Cache warm-up failed for {path}: {e}")
+            finally:
+                with self._pending_lock:
+                    self._active = None
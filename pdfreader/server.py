@@ -2,59 +2,90 @@
 """
 Minimal MCP Server - PDF Reader Only
 Author: Vipin Ruhal
-Description: Provides a single tool to read and extract text from PDF files.
+Description: Provides tools to read and extract text and metadata from PDF files.
 """
 
 from mcp.server.fastmcp import FastMCP
 import json
-import pdfplumber
+import sys
 from pathlib import Path
+from typing import Optional
 import argparse
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import pdf_tools
+
 # Create MCP server
 mcp = FastMCP("PDF Reader MCP Server")
 
 BASE_DIR = Path(__file__).parent
 PDF_FILE = BASE_DIR / "Tendernotice_1.pdf"
 
+# Set by --watch-dir: pre-extracts that folder into the page cache in the background
+warmer: Optional[pdf_tools.CacheWarmer] = None
+
+
+def _resolve_pdf(file_path: Optional[str]) -> Path:
+    """Resolve a tool's file_path argument; defaults to PDF_FILE."""
+    if not file_path:
+        return PDF_FILE
+    path = Path(file_path)
+    return path if path.is_absolute() else BASE_DIR / path
+
 # =============================================
 # PDF READING TOOL
 # =============================================
 @mcp.tool()
-def read_pdf(extract_metadata: bool = False) -> str:
+def read_pdf(extract_metadata: bool = False, page_start: int = 1, page_end: Optional[int] = None,
+             max_chars: Optional[int] = None, cursor: Optional[str] = None, backend: str = "layout",
+             stream: bool = False, memory_budget_mb: Optional[int] = None,
+             file_path: Optional[str] = None) -> str:
     """
     Read and return text from PDF file with optional metadata.
+    Page text is served from the shared on-disk cache when the file is unchanged.
+    Large documents can be paged through with page_start/page_end and max_chars;
+    a truncated response ends with a cursor to pass back for the next window.
     
     Args:
         extract_metadata: Whether to include PDF metadata (default: False)
+        page_start: First page to return, 1-based (default: 1)
+        page_end: Last page to return (default: last page)
+        max_chars: Stop after this many characters of page text (default: no limit)
+        cursor: Continuation cursor from a previous truncated response
+        backend: "layout" (pdfplumber, default), "fast" (PyPDF2) or "auto" (fast, falling
+            back to layout for pages with empty or garbled output)
+        stream: Extract page by page with bounded memory and report peak memory use
+        memory_budget_mb: RSS limit for stream mode; extraction stops with a cursor when exceeded
+        file_path: PDF to read, relative to this server (default: Tendernotice_1.pdf)
     """
-   
-        
-    result = []
-        
-    with pdfplumber.open(PDF_FILE) as pdf:
-        if extract_metadata and pdf.metadata:
-                result.append(f"PDF Metadata: {json.dumps(pdf.metadata, indent=2, default=str)}\n")
-            
-        result.append(f"Total pages: {len(pdf.pages)}\n")
-            
-        text_content = ""
-        for i, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text() or ""
-                if page_text.strip():
-                    text_content += f"\n--- Page {i} ---\n{page_text}\n"
-            
-        if text_content.strip():
-                result.append(text_content)
-        else:
-                result.append("No readable text found in PDF")
-        
-        
-        return "".join(result)
+    try:
+        return pdf_tools.read_pdf_text(
+            _resolve_pdf(file_path), extract_metadata, page_start=page_start, page_end=page_end, max_chars=max_chars,
+            cursor=cursor, backend=backend, stream=stream, memory_budget_mb=memory_budget_mb,
+        )
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+@mcp.tool()
+def pdf_info(file_path: Optional[str] = None) -> str:
+    """
+    Return page count and metadata of the PDF file without extracting its text.
     
-   
-      
-    return f"Error reading PDF: {str(e)}"
+    Args:
+        file_path: PDF to inspect, relative to this server (default: Tendernotice_1.pdf)
+    """
+    try:
+        return json.dumps(pdf_tools.pdf_info(_resolve_pdf(file_path)), indent=2)
+    except Exception as e:
+        return f"Error reading PDF info: {str(e)}"
+
+@mcp.tool()
+def cache_status() -> str:
+    """Return page cache hit/miss counters and background warm-up progress."""
+    status = {"cache": pdf_tools.get_cache().stats()}
+    if warmer is not None:
+        status["warmup"] = warmer.status()
+    return json.dumps(status, indent=2)
 
 # =============================================
 # MAIN ENTRYPOINT
@@ -63,5 +94,12 @@ if __name__ == "__main__":
     print("🚀 Unified Advanced MCP Server started.")
     parser = argparse.ArgumentParser()
     parser.add_argument("--server_type", type=str, default="sse", choices=["sse", "stdio"])
+    parser.add_argument("--watch-dir", type=str, default=None,
+                        help="Warm the PDF cache for this folder in the background and keep it fresh")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="Seconds between scans when inotify is unavailable")
     args = parser.parse_args()
+    if args.watch_dir:
+        warmer = pdf_tools.CacheWarmer(args.watch_dir, poll_interval=args.poll_interval).start()
+        print(f"Warming PDF cache for {warmer.directory} ({warmer.status()['watch_mode']})")
     mcp.run(args.server_type)
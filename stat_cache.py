@@ -0,0 +1,280 @@
+"""
+File metadata cache for the MCP servers.
+Description: Keeps stat() results and directory listings in memory so status
+and listing tools do not hit the filesystem on every call. Directories are
+watched with inotify (through file_watch) and their entries dropped as soon
+as something changes; where inotify is unavailable, or for directories past
+the watch limit, entries simply expire after a short TTL. All directories
+share one inotify instance and reader thread. Only directories on local
+filesystems are watched: inotify never hears of changes made by other
+machines on a network mount.
+"""
+
+import logging
+import os
+import stat as stat_module
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+from file_watch import WatchSet
+
+logger = logging.getLogger(__name__)
+
+STAT_CACHE_TTL = float(os.environ.get("MCP_STAT_TTL", 5.0))  # seconds, unwatched entries
+STAT_CACHE_MAX_AGE = float(os.environ.get("MCP_STAT_MAX_AGE", 300.0))  # seconds, watched entries
+# Filesystems where every change goes through this kernel, so inotify sees it
+LOCAL_FILESYSTEMS = frozenset({
+    "ext2", "ext3", "ext4", "xfs", "btrfs", "bcachefs", "zfs", "f2fs", "jfs", "reiserfs",
+    "tmpfs", "ramfs", "overlay", "vfat", "exfat", "ntfs3", "hfsplus",
+})
+
+
+class CachedStat(NamedTuple):
+    path: str
+    stat: Optional[os.stat_result]  # None if the path does not exist
+    error: Optional[str]
+    readable: bool
+    writable: bool
+    cached_at: float
+
+
+class CachedEntry(NamedTuple):
+    name: str
+    path: str
+    is_file: bool
+    is_dir: bool
+    stat: Optional[os.stat_result]  # None for broken symlinks and vanished entries
+
+
+class CachedListing(NamedTuple):
+    path: str
+    entries: List[CachedEntry]
+    cached_at: float
+
+
+def cache_age(cached_at: float) -> float:
+    """Seconds since an entry was read from disk, rounded for output."""
+    return round(time.time() - cached_at, 3)
+
+
+def _unescape_mount(field: str) -> str:
+    return field.replace("\\040", " ").replace("\\011", "\t").replace("\\012", "\n").replace("\\134", "\\")
+
+
+@lru_cache(maxsize=4096)
+def is_local_filesystem(directory: str) -> bool:
+    """
+    Whether directory is on a filesystem in LOCAL_FILESYSTEMS, going by
+    /proc/self/mounts. False where that can't be told (no /proc, unknown type).
+    """
+    try:
+        with open("/proc/self/mounts", encoding="utf-8", errors="replace") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    path = os.path.realpath(directory)
+    best, fstype = "", None
+    for fields in mounts:
+        if len(fields) < 2:
+            continue
+        mount_point = _unescape_mount(fields[0])
+        inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+        # Later mounts on the same point hide earlier ones
+        if inside and len(mount_point) >= len(best):
+            best, fstype = mount_point, fields[1]
+    return fstype in LOCAL_FILESYSTEMS
+
+
+class StatCache:
+    """
+    Process-wide cache of stat() results and directory listings.
+
+    The first lookup under a directory on a local filesystem adds an inotify
+    watch on it (up to max_watches directories) before anything there is
+    read; any event there drops the cached stat of the changed path and the
+    directory's listing. Entries are trusted for max_age (as a safety net)
+    only while their directory is watched, and for ttl otherwise.
+
+    Events arrive asynchronously, so code that changes files itself calls
+    note_change() right afterwards.
+    """
+
+    def __init__(self, ttl: float = STAT_CACHE_TTL, max_age: float = STAT_CACHE_MAX_AGE,
+                 max_entries: int = 50000, max_watches: int = 256, watch: bool = True):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_watches = max_watches
+        self.watch = watch
+        self._stats: "OrderedDict[str, CachedStat]" = OrderedDict()
+        self._listings: "OrderedDict[str, CachedListing]" = OrderedDict()
+        self._watch_set: Optional[WatchSet] = None
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------- watching ---------------- #
+
+    def _watched(self, directory: str) -> bool:
+        """
+        Whether directory has a live inotify watch, adding one if allowed.
+        Called with the lock held, before the directory's entries are read.
+        """
+        if not self.watch:
+            return False
+        if self._watch_set is None:
+            try:
+                self._watch_set = WatchSet(self._on_change)
+            except OSError as e:
+                # Polling would cost more stat() calls than the cache saves
+                logger.info(f"Stat cache falls back to TTL expiry: {e}")
+                self.watch = False
+                return False
+        if self._watch_set.is_watched(directory):
+            return True
+        if len(self._watch_set) >= self.max_watches or not is_local_filesystem(directory):
+            return False
+        if not self._watch_set.add(directory):
+            return False
+        # Entries read before the watch existed may have missed changes
+        self._generation += 1
+        for cache in (self._stats, self._listings):
+            for key in [key for key in cache if os.path.dirname(key) == directory]:
+                del cache[key]
+        self._listings.pop(directory, None)
+        return True
+
+    def _on_change(self, path: str):
+        self.invalidate(path)
+
+    def invalidate(self, path: str):
+        """Drop cached data for path, its parent's listing, and anything beneath it."""
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            self._generation += 1
+            was_listed = self._listings.pop(path, None) is not None
+            self._stats.pop(path, None)
+            # The parent's listing and its own mtime change with its entries
+            self._listings.pop(os.path.dirname(path), None)
+            self._stats.pop(os.path.dirname(path), None)
+            if was_listed or os.path.isdir(path):
+                for cache in (self._stats, self._listings):
+                    for key in [key for key in cache if key.startswith(prefix)]:
+                        del cache[key]
+
+    def note_change(self, path: str):
+        """
+        Drop everything a change to path made stale, for callers that made the
+        change themselves and can't wait for the inotify event: path itself
+        (see invalidate) and its parent's entry in the grandparent's listing,
+        whose mtime moved.
+        """
+        self.invalidate(path)
+        parent = os.path.dirname(os.path.abspath(path))
+        with self._lock:
+            self._generation += 1
+            self._listings.pop(os.path.dirname(parent), None)
+
+    def _fresh(self, cached_at: float, directory: str) -> bool:
+        watched = self._watch_set is not None and self._watch_set.is_watched(directory)
+        limit = self.max_age if watched else self.ttl
+        return time.time() - cached_at < limit
+
+    def _store(self, cache: OrderedDict, key: str, value, generation: int):
+        if generation != self._generation:
+            return  # something changed while we were reading; don't cache a stale result
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    # ---------------- lookups ---------------- #
+
+    def lookup(self, path: str) -> CachedStat:
+        """stat() and access checks for path, from the cache when still valid."""
+        path = os.path.abspath(path)
+        directory = os.path.dirname(path)
+        with self._lock:
+            cached = self._stats.get(path)
+            if cached is not None and self._fresh(cached.cached_at, directory):
+                self.hits += 1
+                self._stats.move_to_end(path)
+                return cached
+            self.misses += 1
+            self._watched(directory)
+            generation = self._generation
+
+        now = time.time()
+        try:
+            stat = os.stat(path)
+            entry = CachedStat(path, stat, None, os.access(path, os.R_OK), os.access(path, os.W_OK), now)
+        except OSError as e:
+            entry = CachedStat(path, None, str(e), False, False, now)
+        with self._lock:
+            if entry.stat is not None and stat_module.S_ISDIR(entry.stat.st_mode):
+                self._watched(path)
+            self._store(self._stats, path, entry, generation)
+        return entry
+
+    def listdir(self, directory: str) -> CachedListing:
+        """
+        Entries of directory with their stat() results, from the cache when
+        still valid. Raises OSError if the directory cannot be listed.
+        """
+        directory = os.path.abspath(directory)
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is not None and self._fresh(cached.cached_at, directory):
+                self.hits += 1
+                self._listings.move_to_end(directory)
+                return cached
+            self.misses += 1
+            self._watched(directory)
+            generation = self._generation
+
+        now = time.time()
+        entries = []
+        with os.scandir(directory) as it:
+            for item in it:
+                try:
+                    stat = item.stat()
+                    is_dir = item.is_dir()
+                    is_file = not is_dir and item.is_file()
+                except OSError:
+                    stat, is_dir, is_file = None, False, False
+                entries.append(CachedEntry(item.name, item.path, is_file, is_dir, stat))
+        listing = CachedListing(directory, entries, now)
+        with self._lock:
+            self._store(self._listings, directory, listing, generation)
+        return listing
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "stats": len(self._stats),
+                    "listings": len(self._listings),
+                    "watched_dirs": len(self._watch_set) if self._watch_set is not None else 0}
+
+
+_default_cache: Optional[StatCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_stat_cache() -> StatCache:
+    """Return the process-wide stat cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = StatCache()
+        return _default_cache
+
+
+def note_change(*paths: str):
+    """StatCache.note_change on the process-wide cache, for each path."""
+    cache = get_stat_cache()
+    for path in paths:
+        cache.note_change(path)
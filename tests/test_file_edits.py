@@ -0,0 +1,148 @@
+import pytest
+
+import file_edits
+from file_edits import apply_unified_diff, replace_lines
+
+
+def test_diff_replaces_a_line():
+    text = "a\nb\nc\n"
+    diff = "--- a/f\n+++ b/f\n@@ -2 +2 @@\n-b\n+B\n"
+    assert apply_unified_diff(text, diff) == ("a\nB\nc\n", 1, 1, 1)
+
+
+def test_diff_inserts_after_line_n():
+    text = "a\nb\nc\n"
+    # A hunk that removes nothing inserts after line N of the old file
+    assert apply_unified_diff(text, "@@ -2,0 +3 @@\n+x\n")[0] == "a\nb\nx\nc\n"
+    assert apply_unified_diff(text, "@@ -0,0 +1 @@\n+x\n")[0] == "x\na\nb\nc\n"
+    assert apply_unified_diff(text, "@@ -3,0 +4 @@\n+x\n")[0] == "a\nb\nc\nx\n"
+
+
+def test_diff_adds_line_without_newline_at_eof():
+    text = "a\nb\n"
+    diff = "@@ -2 +2,2 @@\n b\n+c\n\\ No newline at end of file\n"
+    assert apply_unified_diff(text, diff)[0] == "a\nb\nc"
+
+
+def test_diff_replaces_last_line_without_newline():
+    text = "a\nb"
+    diff = "@@ -2 +2 @@\n-b\n\\ No newline at end of file\n+B\n"
+    assert apply_unified_diff(text, diff)[0] == "a\nB\n"
+
+
+def test_diff_keeps_crlf_line_endings():
+    text = "a\r\nb\r\nc\r\n"
+    assert apply_unified_diff(text, "@@ -2 +2 @@\n-b\n+B\n")[0] == "a\r\nB\r\nc\r\n"
+    # The diff itself may come with CRLF line endings
+    assert apply_unified_diff(text, "@@ -2 +2 @@\r\n-b\r\n+B\r\n")[0] == "a\r\nB\r\nc\r\n"
+
+
+@pytest.mark.parametrize("separator", ["\x0c", "\x1c", "\u2028", "\x85"])
+def test_diff_lines_may_contain_unicode_line_separators(separator):
+    text = f"a\nb{separator}c\nd\n"
+    diff = f"@@ -2 +2 @@\n-b{separator}c\n+x{separator}y\n"
+    assert apply_unified_diff(text, diff) == (f"a\nx{separator}y\nd\n", 1, 1, 1)
+
+
+def test_diff_without_trailing_newline_is_accepted():
+    assert apply_unified_diff("a\nb\n", "@@ -1 +1 @@\n-a\n+A")[0] == "A\nb\n"
+
+
+def test_diff_context_mismatch_raises():
+    with pytest.raises(ValueError, match="does not match"):
+        apply_unified_diff("a\nb\n", "@@ -1 +1 @@\n-z\n+A\n")
+
+
+def test_diff_short_hunk_raises():
+    with pytest.raises(ValueError, match="shorter"):
+        apply_unified_diff("a\nb\nc\n", "@@ -1,3 +1,3 @@\n a\n-b\n+B\n")
+
+
+def test_diff_without_hunks_raises():
+    with pytest.raises(ValueError, match="No hunks"):
+        apply_unified_diff("a\n", "--- a/f\n+++ b/f\n")
+
+
+def test_replace_lines():
+    assert replace_lines("a\nb\nc\n", 2, 2, "B") == ("a\nB\nc\n", 1, 1)
+    assert replace_lines("a\nb\nc\n", 1, 3, "x\n") == ("x\n", 1, 3)
+
+
+def test_replace_lines_inserts_when_end_is_before_start():
+    assert replace_lines("a\nb\n", 2, 1, "x") == ("a\nx\nb\n", 1, 0)
+    assert replace_lines("a\nb\n", 3, 2, "x") == ("a\nb\nx\n", 1, 0)
+
+
+def test_replace_lines_follows_file_at_eof():
+    assert replace_lines("a\nb", 2, 2, "B") == ("a\nB", 1, 1)
+    assert replace_lines("a\r\nb\r\n", 1, 1, "A") == ("A\r\nb\r\n", 1, 1)
+
+
+def test_replace_lines_out_of_range_raises():
+    with pytest.raises(ValueError):
+        replace_lines("a\n", 3, 3, "x")
+
+
+def test_edit_file_checks_base_hash(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_bytes(b"a\r\nb\r\n")
+    base = file_edits.content_hash(path.read_bytes())
+
+    with pytest.raises(file_edits.StaleBaseHash) as error:
+        file_edits.edit_file(str(path), "0" * 64, start_line=1, replacement="A")
+    assert error.value.current == base
+
+    hunks, added, removed, new_hash = file_edits.edit_file(str(path), base.upper(), start_line=1, replacement="A")
+    assert path.read_bytes() == b"A\r\nb\r\n"
+    assert (hunks, added, removed) == (1, 1, 1)
+    assert new_hash == file_edits.content_hash(path.read_bytes())
+
+
+def test_edit_file_keeps_file_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_bytes(b"#!/bin/sh\necho a\n")
+    path.chmod(0o755)
+    file_edits.edit_file(str(path), file_edits.content_hash(path.read_bytes()), start_line=2, replacement="echo b")
+    assert path.read_bytes() == b"#!/bin/sh\necho b\n"
+    assert path.stat().st_mode & 0o777 == 0o755
+
+
+def test_atomic_write_gives_new_files_the_umask_mode(tmp_path):
+    path = tmp_path / "new.txt"
+    file_edits.atomic_write(str(path), "x")
+    assert path.stat().st_mode & 0o777 == 0o666 & ~file_edits._UMASK
+
+
+def test_atomic_write_many_keeps_file_modes(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("old")
+    path.chmod(0o644)
+    file_edits.atomic_write_many({str(path): "new", str(tmp_path / "b.txt"): "b"})
+    assert path.read_text() == "new"
+    assert path.stat().st_mode & 0o777 == 0o644
+    assert (tmp_path / "b.txt").stat().st_mode & 0o777 == 0o666 & ~file_edits._UMASK
+
+
+def test_atomic_write_many_rolls_back_when_a_rename_fails(tmp_path, monkeypatch):
+    first, second, third = (tmp_path / name for name in ("1.txt", "2.txt", "3.txt"))
+    first.write_text("one")
+    third.write_text("three")
+
+    real_replace = file_edits.os.replace
+    calls = []
+
+    def failing_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 3:  # 1.txt and 2.txt are renamed into place, 3.txt fails
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(file_edits.os, "replace", failing_replace)
+    with pytest.raises(OSError, match="disk full"):
+        file_edits.atomic_write_many({str(first): "ONE", str(second): "TWO", str(third): "THREE"})
+
+    assert first.read_text() == "one"
+    assert third.read_text() == "three"
+    assert not second.exists()
+    # No temp files or backups are left behind
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["1.txt", "3.txt"]
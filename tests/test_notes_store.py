@@ -0,0 +1,27 @@
+import threading
+
+import notes_store
+
+
+def test_indexes_sharing_a_database_index_each_line_once(tmp_path):
+    # Separate NotesIndex objects stand in for separate server processes:
+    # each has its own connection and in-process lock.
+    log = tmp_path / "Notes.txt"
+    log.touch()
+    indexes = [notes_store.NotesIndex(log, tmp_path / "notes_fts.db") for _ in range(4)]
+    append_lock = threading.Lock()
+
+    def append_and_sync(index):
+        for i in range(100):
+            with append_lock, open(log, "a", encoding="utf-8") as f:
+                f.write(f"tender note {i}\n")
+            index.sync()
+
+    threads = [threading.Thread(target=append_and_sync, args=(index,)) for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    indexes[0].sync()
+
+    assert indexes[0].search("tender", limit=1)["total"] == 400
@@ -0,0 +1,23 @@
+import stat_cache
+
+
+def test_note_change_makes_own_writes_visible_at_once(tmp_path):
+    # Without watches, only note_change (not an inotify event) can drop the entries
+    cache = stat_cache.StatCache(ttl=60, watch=False)
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    assert cache.listdir(str(sub)).entries == []
+    assert cache.lookup(str(sub / "new.txt")).stat is None
+    parent_listing = cache.listdir(str(tmp_path))
+
+    (sub / "new.txt").write_text("x")
+    cache.note_change(str(sub / "new.txt"))
+
+    assert [entry.name for entry in cache.listdir(str(sub)).entries] == ["new.txt"]
+    assert cache.lookup(str(sub / "new.txt")).stat.st_size == 1
+    # sub's own mtime moved, so its entry in the parent listing is re-read too
+    assert cache.listdir(str(tmp_path)) is not parent_listing
+
+
+def test_unknown_filesystems_are_not_local():
+    assert not stat_cache.is_local_filesystem("/proc")
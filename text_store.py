@@ -0,0 +1,334 @@
+"""
+Text file helpers for the MCP servers.
+Description: Keeps word/character/line statistics for a text file that are
+updated incrementally when the file is appended to (and recounted when it is
+rewritten), a persisted sparse line-offset index for very large files, and
+byte- or line-ranged reads so large files can be paged through without
+loading them whole.
+"""
+
+import codecs
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache_paths import CACHE_DIR
+
+LINE_INDEX_DIR = CACHE_DIR / "line_index"
+_FINGERPRINT_BYTES = 4096
+
+
+def _is_continuation(byte: int) -> bool:
+    return byte & 0xC0 == 0x80
+
+
+def _tail_fingerprint(f, end: int) -> bytes:
+    """Hash of the bytes just before end, to check an append left them intact."""
+    start = max(0, end - _FINGERPRINT_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(end - start)).digest()
+
+
+def _checkpoints(data: bytes, base: int, newlines: int, stride: int) -> List[int]:
+    """
+    Byte offsets (base-relative data plus base) of the lines numbered
+    k * stride + 1 that start inside data, given `newlines` seen before it.
+    """
+    found = []
+    count = data.count(b"\n")
+    if newlines // stride != (newlines + count) // stride:
+        index = -1
+        for line_no in range(newlines + 1, newlines + count + 1):
+            index = data.find(b"\n", index + 1)
+            if line_no % stride == 0:
+                found.append(base + index + 1)
+    return found
+
+
+def read_utf8_range(path: Path, offset: int, length: int) -> Tuple[str, int, int]:
+    """
+    Read about `length` bytes starting at `offset`, widened or narrowed to
+    whole UTF-8 characters. Returns (text, start, end) in byte offsets.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        start = min(max(offset, 0), size)
+        f.seek(start)
+        data = f.read(length + 4)
+    # Skip to the first character boundary
+    skip = 0
+    while skip < min(3, len(data)) and _is_continuation(data[skip]):
+        skip += 1
+    start += skip
+    data = data[skip:]
+    # Stop before a character that would be cut in half
+    cut = min(length, len(data))
+    while 0 < cut < len(data) and _is_continuation(data[cut]):
+        cut -= 1
+    if cut == 0 and length > 0 and data:
+        # Always return at least one whole character
+        cut = 1
+        while cut < len(data) and _is_continuation(data[cut]):
+            cut += 1
+    return data[:cut].decode("utf-8", errors="replace"), start, start + cut
+
+
+class TextStats:
+    """
+    Statistics for one text file, tied to its inode, size and mtime.
+
+    sync() compares the file with what was counted last time: an unchanged file
+    costs one stat(), an append is counted from the previous end (after checking
+    the bytes before it still match), and anything else is recounted from the
+    start in fixed-size chunks. Word and character counts match
+    len(content.split()) and len(content.strip()) on the whole file.
+    """
+
+    def __init__(self, path: Path, chunk_size: int = 1024 * 1024):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[int, int, int]] = None
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._fingerprint = b""
+        self._chars = 0
+        self._words = 0
+        self._newlines = 0
+        self._leading_ws = 0
+        self._trailing_ws = 0
+        self._seen_text = False
+        self._in_word = False
+        self._ends_with_newline = False
+
+    def sync(self) -> Dict[str, Any]:
+        """Bring the statistics up to date with the file and return them."""
+        stat = self.path.stat()
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key == self._key:
+                return self._snapshot(stat.st_size)
+
+            with open(self.path, "rb") as f:
+                appended = (self._key is not None and stat.st_ino == self._key[0]
+                            and stat.st_size >= self._offset
+                            and _tail_fingerprint(f, self._offset) == self._fingerprint)
+                if not appended:
+                    self._reset()
+                self._count(f, stat.st_size)
+                self._fingerprint = _tail_fingerprint(f, self._offset)
+            self._key = key
+            return self._snapshot(stat.st_size)
+
+    def _count(self, f, end: int):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        position = self._offset
+        f.seek(position)
+        while position < end:
+            data = f.read(min(self.chunk_size, end - position))
+            if not data:
+                break
+            self._newlines += data.count(b"\n")
+            position += len(data)
+            self._add_text(decoder.decode(data, final=False))
+            self._ends_with_newline = data.endswith(b"\n")
+
+        # Leave an incomplete multi-byte character (a write in progress) for next time
+        pending = decoder.getstate()[0]
+        self._offset = position - len(pending)
+
+    def _add_text(self, text: str):
+        if not text:
+            return
+        self._chars += len(text)
+
+        words = len(text.split())
+        if words and self._in_word and not text[0].isspace():
+            words -= 1  # a word split across chunks
+        self._words += words
+
+        stripped_end = text.rstrip()
+        if stripped_end:
+            self._trailing_ws = len(text) - len(stripped_end)
+            if not self._seen_text:
+                self._leading_ws += len(text) - len(text.lstrip())
+                self._seen_text = True
+        else:
+            self._trailing_ws += len(text)
+            if not self._seen_text:
+                self._leading_ws += len(text)
+        self._in_word = not text[-1].isspace()
+
+    def _snapshot(self, size: int) -> Dict[str, Any]:
+        lines = self._newlines + (1 if size and not self._ends_with_newline else 0)
+        chars = self._chars - self._leading_ws - self._trailing_ws if self._seen_text else 0
+        return {"words": self._words, "chars": chars, "lines": lines, "bytes": size}
+
+    # ---------------- ranged reads ---------------- #
+
+    def read_bytes(self, offset: int, length: int) -> Tuple[str, int, int]:
+        """Ranged read of the file; see read_utf8_range."""
+        return read_utf8_range(self.path, offset, length)
+
+    def read_lines(self, line_start: int, line_end: Optional[int] = None) -> Tuple[List[str], int]:
+        """
+        Return lines line_start..line_end (1-based, inclusive) without their
+        newlines, and the number of the first line not returned. Lines are found
+        through the file's LineIndex, so earlier parts of the file are skipped.
+        """
+        line_start = max(line_start, 1)
+        try:
+            start, end, last = get_line_index(self.path).line_range(
+                line_start, line_end if line_end is not None else sys.maxsize)
+        except ValueError:
+            return [], line_start  # past the end of the file
+        lines = read_byte_range(self.path, start, end).split("\n")
+        if lines and not lines[-1]:
+            lines.pop()  # after the last line's newline
+        return [line.rstrip("\r") for line in lines], last + 1
+
+
+# =============================================
+# LINE INDEX
+# =============================================
+
+_INDEX_HEADER = struct.Struct("<8sQQQQQQ20s?")  # magic, inode, size, mtime_ns, stride, offset, newlines, fingerprint, ends_with_newline
+_INDEX_MAGIC = b"MCPLIDX1"
+
+
+class LineIndex:
+    """
+    Sparse line-offset index for one file, persisted under LINE_INDEX_DIR.
+
+    Every `stride`-th line start is recorded, so finding a line costs at most
+    `stride` newline searches from the nearest checkpoint and the index stays
+    small (8 bytes per `stride` lines). Like TextStats, an appended file is
+    indexed from its previous end; anything else is reindexed from the start.
+    """
+
+    def __init__(self, path: Path, stride: int = 256, index_dir: Path = LINE_INDEX_DIR):
+        self.path = Path(path)
+        self.stride = stride
+        self.index_file = Path(index_dir) / (hashlib.sha1(str(self.path).encode("utf-8", "surrogateescape")).hexdigest() + ".idx")
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[int, int, int]] = None
+        self._offset = 0
+        self._newlines = 0
+        self._ends_with_newline = False
+        self._fingerprint = b""
+        self._offsets = array("Q", [0])
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, "rb") as f:
+                header = f.read(_INDEX_HEADER.size)
+                magic, inode, size, mtime_ns, stride, offset, newlines, fingerprint, ends = _INDEX_HEADER.unpack(header)
+                if magic != _INDEX_MAGIC or stride != self.stride:
+                    return
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return
+        self._key = (inode, size, mtime_ns)
+        self._offset, self._newlines, self._ends_with_newline = offset, newlines, ends
+        self._fingerprint, self._offsets = fingerprint, offsets
+
+    def _save(self):
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_file.parent, prefix=".tmp_")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, *self._key, self.stride, self._offset,
+                                           self._newlines, self._fingerprint, self._ends_with_newline))
+                f.write(self._offsets.tobytes())
+            os.replace(tmp_path, self.index_file)
+        except OSError:
+            pass  # the index is only a cache
+
+    def sync(self) -> Dict[str, int]:
+        """Bring the index up to date and return {"lines", "bytes"}."""
+        stat = self.path.stat()
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key != self._key:
+                with open(self.path, "rb") as f:
+                    appended = (self._key is not None and stat.st_ino == self._key[0]
+                                and stat.st_size >= self._offset
+                                and _tail_fingerprint(f, self._offset) == self._fingerprint)
+                    if not appended:
+                        self._offset, self._newlines, self._ends_with_newline = 0, 0, False
+                        self._offsets = array("Q", [0])
+                    f.seek(self._offset)
+                    while self._offset < stat.st_size:
+                        data = f.read(min(4 * 1024 * 1024, stat.st_size - self._offset))
+                        if not data:
+                            break
+                        self._offsets.extend(_checkpoints(data, self._offset, self._newlines, self.stride))
+                        self._newlines += data.count(b"\n")
+                        self._offset += len(data)
+                        self._ends_with_newline = data.endswith(b"\n")
+                    self._fingerprint = _tail_fingerprint(f, self._offset)
+                self._key = key
+                self._save()
+            lines = self._newlines + (1 if self._offset and not self._ends_with_newline else 0)
+            return {"lines": lines, "bytes": self._offset}
+
+    def line_range(self, line_start: int, line_end: int) -> Tuple[int, int, int]:
+        """
+        Byte range [start, end) covering lines line_start..line_end (1-based,
+        inclusive, clamped to the file). Returns (start, end, last line included).
+        Raises ValueError if line_start is past the end of the file.
+        """
+        total = self.sync()["lines"]
+        if line_start < 1 or line_start > total:
+            raise ValueError(f"line_start {line_start} is outside the file (1-{total})")
+        line_end = min(max(line_end, line_start), total)
+
+        with self._lock:
+            checkpoint = (line_start - 1) // self.stride
+            position = self._offsets[checkpoint]
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            for _ in range(line_start - 1 - checkpoint * self.stride):
+                position = mm.find(b"\n", position) + 1
+            start = end = position
+            for _ in range(line_end - line_start + 1):
+                newline = mm.find(b"\n", end)
+                end = size if newline < 0 else newline + 1
+        return start, end, line_end
+
+
+_line_indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+def get_line_index(path: Path, max_open: int = 64) -> LineIndex:
+    """Process-wide LineIndex for path, so repeated reads reuse it."""
+    key = os.path.abspath(path)
+    with _line_indexes_lock:
+        index = _line_indexes.get(key)
+        if index is None:
+            index = _line_indexes[key] = LineIndex(Path(key))
+            while len(_line_indexes) > max_open:
+                _line_indexes.popitem(last=False)
+        _line_indexes.move_to_end(key)
+        return index
+
+
+def read_byte_range(path: Path, start: int, end: int) -> str:
+    """Decode path[start:end] through mmap, without reading the rest of the file."""
+    if end <= start:
+        return ""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[start:end].decode("utf-8", errors="replace")
@@ -0,0 +1,230 @@
+"""
+Persistent trigram index for find_in_files.
+Description: A SQLite FTS5 trigram index over the text files under a
+directory, so a search only opens files that contain every trigram of the
+search term. The index is updated incrementally from file sizes/mtimes and
+stores no file content.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cache_paths import CACHE_DIR
+from ignore_rules import IgnoreRules
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_INDEX_FILE = CACHE_DIR / "trigram_index.db"
+MAX_INDEXED_BYTES = 4 * 1024 * 1024  # larger text files are always scanned
+_SNIFF_BYTES = 8192
+
+
+def is_binary(sample: bytes) -> bool:
+    """Treat data with NUL bytes in its first block as binary."""
+    return b"\0" in sample[:_SNIFF_BYTES]
+
+
+def term_trigrams(term: str) -> List[str]:
+    """Distinct trigrams of a search term, in order of first appearance."""
+    seen = []
+    for i in range(len(term) - 2):
+        gram = term[i:i + 3]
+        if gram not in seen:
+            seen.append(gram)
+    return seen
+
+
+class TrigramIndex:
+    """
+    Contentless FTS5 trigram index (detail=none) of text files.
+
+    Each indexed version of a file is one FTS document. Contentless rows cannot
+    be deleted, so a changed file gets a new document and the old one becomes
+    stale; searches only consider current documents, and the index is rebuilt
+    once stale documents outnumber live ones.
+
+    Files that are binary (NUL bytes) are skipped; files over
+    MAX_INDEXED_BYTES or not valid UTF-8 are recorded as unindexed and always
+    returned as candidates.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: Path = TRIGRAM_INDEX_FILE):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS files")
+                self._conn.execute("DROP TABLE IF EXISTS grams")
+                self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._create_tables()
+
+    def _create_tables(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                doc_id INTEGER,          -- NULL: not indexed, always a candidate
+                binary INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS files_doc ON files (doc_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS grams USING fts5(
+                body, tokenize = 'trigram', detail = none, content = ''
+            );
+        """)
+
+    # ---------------- maintenance ---------------- #
+
+    def refresh(self, directory: str) -> Dict[str, int]:
+        """
+        Bring the index for every file under directory up to date. Every file
+        is re-stat()ed, so call this before each query: a file changed since
+        the last refresh would otherwise be neither re-indexed nor scanned.
+        """
+        directory = os.path.abspath(directory)
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        prefix = directory.rstrip(os.sep) + os.sep
+        with self._lock:
+            known = {
+                path: (size, mtime_ns)
+                for path, size, mtime_ns in self._conn.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            }
+
+        seen = set()
+        rules = IgnoreRules(directory, use_gitignore=False)
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not rules.is_ignored(entry.path, True):
+                            stack.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                seen.add(entry.path)
+                previous = known.get(entry.path)
+                if previous == (stat.st_size, stat.st_mtime_ns):
+                    counts["unchanged"] += 1
+                    continue
+                try:
+                    self._index_file(entry.path, stat)
+                except OSError:
+                    continue  # Skip files that can't be read
+                counts["updated" if previous else "added"] += 1
+
+        removed = [path for path in known if path not in seen]
+        if removed:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            counts["removed"] = len(removed)
+
+        if self._maybe_rebuild():
+            return self.refresh(directory)
+        return counts
+
+    def _index_file(self, path: str, stat: os.stat_result):
+        doc_text, binary = None, False
+        if stat.st_size <= MAX_INDEXED_BYTES:
+            with open(path, "rb") as f:
+                data = f.read()
+            binary = is_binary(data)
+            if not binary:
+                try:
+                    doc_text = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    doc_text = None
+        else:
+            with open(path, "rb") as f:
+                binary = is_binary(f.read(_SNIFF_BYTES))
+
+        with self._lock, self._conn:
+            doc_id = None
+            if doc_text is not None:
+                doc_id = self._conn.execute("INSERT INTO grams (body) VALUES (?)", (doc_text,)).lastrowid
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, doc_id, binary) VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, doc_id, int(binary)),
+            )
+
+    def _maybe_rebuild(self) -> bool:
+        """Drop the FTS table once stale documents outnumber live ones. Returns True if dropped."""
+        with self._lock:
+            live = self._conn.execute("SELECT count(*) FROM files WHERE doc_id IS NOT NULL").fetchone()[0]
+            total = self._conn.execute("SELECT max(rowid) FROM grams").fetchone()[0] or 0
+            stale = total - live
+            if stale < 1000 or stale < live:
+                return False
+            logger.info(f"Rebuilding trigram index ({stale} stale documents, {live} live)")
+            with self._conn:
+                self._conn.execute("DROP TABLE grams")
+                # Forget stored stats so the next refresh re-indexes everything
+                self._conn.execute("DELETE FROM files")
+                self._create_tables()
+        return True
+
+    # ---------------- queries ---------------- #
+
+    def candidates(self, term: str, directory: str) -> Tuple[List[str], int]:
+        """
+        Files under directory that may contain term (case-insensitive), and the
+        number of text files considered. Binary files are never returned.
+        """
+        prefix = os.path.abspath(directory).rstrip(os.sep) + os.sep
+        grams = term_trigrams(term.lower())
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT count(*) FROM files WHERE binary = 0 AND substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchone()[0]
+            if not grams:
+                # Too short for trigrams: every text file is a candidate
+                rows = self._conn.execute(
+                    "SELECT path FROM files WHERE binary = 0 AND substr(path, 1, ?) = ? ORDER BY path",
+                    (len(prefix), prefix),
+                ).fetchall()
+            else:
+                query = " AND ".join('"' + gram.replace('"', '""') + '"' for gram in grams)
+                rows = self._conn.execute(
+                    """SELECT path FROM files
+                       WHERE binary = 0 AND substr(path, 1, ?) = ?
+                         AND (doc_id IS NULL OR doc_id IN (SELECT rowid FROM grams WHERE grams MATCH ?))
+                       ORDER BY path""",
+                    (len(prefix), prefix, query),
+                ).fetchall()
+        return [path for (path,) in rows], total
+
+
+_default_index: Optional[TrigramIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_index() -> TrigramIndex:
+    """Return the process-wide trigram index, creating it on first use."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = TrigramIndex()
+        return _default_index
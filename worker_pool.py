@@ -0,0 +1,44 @@
+"""
+Shared process pool for the MCP servers.
+Description: Long-lived, spawn-based process pools for CPU-bound work (PDF
+page extraction, file search), created on first use and shared by size, so
+a server normally runs a single POOL_WORKERS-process pool.
+
+Spawned workers import the functions they run from their own modules, but
+Python also re-imports the server script in every worker (as __mp_main__).
+Servers therefore keep heavy setup — models, database clients, background
+threads — out of import time, behind lazy getters or `if __name__ == "__main__"`.
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+POOL_WORKERS = int(os.environ.get("MCP_POOL_WORKERS", os.cpu_count() or 1))
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # Ctrl+C goes to the whole process group; let the server shut workers down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Return the long-lived pool with the given number of processes (default:
+    POOL_WORKERS). Callers that keep the default share one pool.
+    """
+    workers = POOL_WORKERS if workers is None else workers
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn: the servers run threads, which do not survive a fork safely.
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker)
+            _pools[workers] = pool
+        return pool